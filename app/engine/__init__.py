@@ -1,73 +1,421 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable
 
-from shobu import Board
+from shobu import Board, MovePair
 
 from .analyze import Analyze
 from .board_node import BoardNode
+from .cache import EvaluationCache
+from .limits import SearchAborted, SearchLimits
+from .ordering import HeuristicMoveOrderer, MoveOrderer
+from .parallel import LazySMP, RootSplitter
+from .stats import SearchStats
+from .transposition import TranspositionTable
 
 
 class Engine:
-    def __init__(self):
-        self._analysis_cache: dict[str, float] = {}
+    # Ways of searching with worker processes
+    ROOT_SPLIT: str = "root_split" # Root moves are split between the workers
+    LAZY_SMP:   str = "lazy_smp"   # Every worker searches the root, sharing one transposition table
 
-        self._analysis = Analyze(None)
+    # Deepest iteration of an iterative deepening search with no max depth
+    MAX_DEPTH: int = 64
+
+    # Leaves evaluated in the first batch at a depth 1 node
+    LEAF_BATCH_SIZE: int = 4
+
+    def __init__(self, table_size_mb: float = 64, cache_size_mb: float = 32, concept_weights: dict[str, float] or None = None,
+                 parallel_mode: str = ROOT_SPLIT, move_orderer: MoveOrderer or None = None,
+                 incremental_evaluation: bool = True):
+        self._table_size_mb: float = table_size_mb
+        self._cache_size_mb: float = cache_size_mb
+
+        # Evaluations keyed by the board's Zobrist hash, bounded to the given size
+        self._analysis_cache = EvaluationCache.from_size_mb(cache_size_mb)
+
+        # Search results kept between searches, bounded to the given size
+        self._transposition_table = TranspositionTable(table_size_mb)
+
+        self._analysis = Analyze(concept_weights)
+
+        # Evaluating from values kept on the board for each sub board (Only the ones a move changed are worked out
+        # again), instead of scoring leaves in batches
+        self._incremental_evaluation: bool = incremental_evaluation
+
+        # Decides the order moves are searched in at every node (Killer moves and history are kept between searches)
+        self._move_orderer: MoveOrderer = move_orderer if move_orderer is not None else HeuristicMoveOrderer()
+
+        # Worker processes for parallel search, started on first use and reused between searches
+        self._parallel_mode: str = parallel_mode
+        self._workers: RootSplitter or LazySMP or None = None
+
+        # Checked at every node, the search is aborted once it returns True
+        self._stop_check: Callable[[], bool] or None = None
+
+        # Statistics of the search being run, only kept when get_best_move is given a SearchStats to fill in
+        self._stats: SearchStats or None = None
+        self._last_stats: SearchStats or None = None
+
+        self._nodes: int = 0
+
+    def close(self) -> None:
+        """
+        Stops any worker processes the engine started. Called at the end of a with block, and worker processes of an
+        engine that is never closed are stopped once it is garbage collected or at exit.
+        """
+        if self._workers is not None:
+            self._workers.shutdown()
+            self._workers = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _exc_type, _exc_value, _traceback):
+        self.close()
+
+    def _get_workers(self, processes: int) -> RootSplitter or LazySMP:
+        if self._workers is None or self._workers.processes != processes:
+            self.close()
+
+            worker_type = LazySMP if self._parallel_mode == self.LAZY_SMP else RootSplitter
+            self._workers = worker_type(processes, self._analysis.concept_weights, self._table_size_mb, self._cache_size_mb)
+
+        return self._workers
+
+    def set_stop_check(self, stop_check: Callable[[], bool] or None) -> None:
+        """
+        Sets a function that is called at every node of a search, raising SearchAborted once it returns True.
+        """
+        self._stop_check = stop_check
+
+    @property
+    def nodes_searched(self) -> int:
+        """
+        Total nodes searched by this engine (Not counting ones searched by worker processes).
+        """
+        return self._nodes
+
+    @property
+    def worker_nodes_searched(self) -> int:
+        """
+        Nodes searched by worker processes in the last parallel search.
+        """
+        return self._workers.last_nodes if self._workers is not None else 0
+
+    @property
+    def last_stats(self) -> SearchStats or None:
+        """
+        Statistics of the last search that was given a SearchStats.
+        """
+        return self._last_stats
+
+    @property
+    def parallel_mode(self) -> str:
+        return self._parallel_mode
+
+    @property
+    def incremental_evaluation(self) -> bool:
+        return self._incremental_evaluation
+
+    @property
+    def move_orderer(self) -> MoveOrderer:
+        return self._move_orderer
+
+    @property
+    def transposition_table(self) -> TranspositionTable:
+        return self._transposition_table
+
+    @property
+    def analysis_cache(self) -> EvaluationCache:
+        return self._analysis_cache
 
     def analyze(self, board: Board):
-        if board.serialized_string not in self._analysis_cache:
-            self._analysis_cache[board.serialized_string] = self._analysis.analyze(board)
+        board_eval = self._analysis_cache.get(board.hash)
+
+        if board_eval is None:
+            if self._incremental_evaluation:
+                board_eval = self._analysis.analyze_incremental(board)
+            else:
+                board_eval = self._analysis.analyze(board)
+            self._analysis_cache.put(board.hash, board_eval)
+
+        return board_eval
 
-        return self._analysis_cache[board.serialized_string]
+    def _leaf_evals(self, board: Board, moves: list[int], ply: int):
+        """
+        Yields the evaluation of the position after each move in order, from the point of view of the player making the
+        moves. Evaluated in batches that double in size, starting small since a cutoff usually comes early.
+        Every evaluated child counts as a searched node.
+        """
+        start = 0
+        batch_size = self.LEAF_BATCH_SIZE
 
-    def _minimax(self, current_board: Board, current_depth: int, alpha, beta):
-        if current_board.has_winner() or current_depth == 0:
-            return self.analyze(current_board), current_board
+        stats = self._stats
+        analyze_many = self._analysis.analyze_many if stats is None else \
+            partial(stats.timed, SearchStats.EVALUATION, self._analysis.analyze_many)
 
+        while start < len(moves):
+            batch = moves[start:start + batch_size]
+            self._nodes += len(batch)
+
+            if stats is not None:
+                stats.enter_node(ply, len(batch))
+                stats.leaf_nodes += len(batch)
+
+            scores = analyze_many(board.get_children_array(batch))
+            yield from (scores if board.current_player_turn == Board.BLACK else -scores).tolist()
+
+            start += len(batch)
+            batch_size *= 2
+
+    def _minimax(self, current_board: Board, current_depth: int, alpha, beta, ply: int = 0):
+        """
+        Searches a position to a depth, returning (score, best move) with the score from black's point of view (Which
+        is what Analyze returns). Alpha and beta are also from black's point of view. Moves in the search are packed
+        ints (See Board.encode_move).
+        """
         if current_board.current_player_turn == Board.BLACK:
-            max_eval = float('-inf')
-            selected_move = None
+            return self._negamax(current_board, current_depth, alpha, beta, ply)
 
-            for move in current_board.get_legal_moves():
-                child_board = current_board.get_mock(move, keep_metadata=True, keep_moves=True)
+        score, best_move = self._negamax(current_board, current_depth, -beta, -alpha, ply)
 
-                child_eval, _ = self._minimax(child_board, current_depth - 1, alpha, beta)
+        return -score, best_move
 
-                if child_eval > max_eval:
-                    max_eval = child_eval
-                    selected_move = move
+    def _negamax(self, current_board: Board, current_depth: int, alpha, beta, ply: int = 0):
+        """
+        Alpha-beta search returning (score, best move) with the score from the point of view of the player to move.
+        Scores outside of (alpha, beta) are bounds on the real score: at most alpha if every move failed low, at least
+        beta if a move caused a cutoff. Scores stored in the transposition table are from the same point of view.
+        """
+        self._nodes += 1
 
-                alpha = max(alpha, child_eval)
-                if beta >= alpha:
-                    break
+        stats = self._stats
+        if stats is not None:
+            stats.enter_node(ply)
+
+        if self._stop_check is not None and self._stop_check():
+            raise SearchAborted
+
+        if current_board.is_terminal or current_depth == 0:
+            if stats is None:
+                board_eval = self.analyze(current_board)
+            else:
+                stats.leaf_nodes += 1
+                board_eval = stats.timed(SearchStats.EVALUATION, self.analyze, current_board)
+
+            return (board_eval if current_board.current_player_turn == Board.BLACK else -board_eval), None
+
+        alpha_original, beta_original = alpha, beta
+
+        # Using a stored result if it was searched deep enough, otherwise only taking its best move to search first
+        entry = self._transposition_table.probe(current_board.hash)
+        table_move = None
+
+        if entry is not None:
+            _key, entry_depth, entry_score, entry_bound, table_move = entry
+
+            if entry_depth >= current_depth:
+                if entry_bound == TranspositionTable.EXACT:
+                    return entry_score, table_move
+
+                elif entry_bound == TranspositionTable.LOWER:
+                    alpha = max(alpha, entry_score)
+
+                elif entry_bound == TranspositionTable.UPPER:
+                    beta = min(beta, entry_score)
+
+                if alpha >= beta:
+                    return entry_score, table_move
 
-            return max_eval, selected_move
+        if stats is None:
+            legal_moves = self._move_orderer.order(current_board, current_board.get_legal_moves_encoded(), ply, table_move)
+            make_move, undo_move = current_board.make_move_encoded, current_board.undo_move
 
-        elif current_board.current_player_turn == Board.WHITE:
-            min_eval = float('inf')
-            selected_move = None
+        else:
+            legal_moves = stats.timed(SearchStats.MOVE_GENERATION, current_board.get_legal_moves_encoded)
+            stats.record_expansion(len(legal_moves))
 
-            for move in current_board.get_legal_moves():
-                child_board = current_board.get_mock(move, keep_metadata=True, keep_moves=True)
+            legal_moves = stats.timed(SearchStats.ORDERING, self._move_orderer.order, current_board, legal_moves, ply,
+                                      table_move)
+            make_move = partial(stats.timed, SearchStats.MAKE_UNDO, current_board.make_move_encoded)
+            undo_move = partial(stats.timed, SearchStats.MAKE_UNDO, current_board.undo_move)
 
-                child_eval, _ = self._minimax(child_board, current_depth - 1, alpha, beta)
+        # Children of a depth 1 node are all leaves, so they are evaluated in batches
+        leaf_evals = None
+        if current_depth == 1 and not self._incremental_evaluation:
+            leaf_evals = self._leaf_evals(current_board, legal_moves, ply + 1)
 
-                if child_eval < min_eval:
-                    min_eval = child_eval
-                    selected_move = move
+        # With no legal moves the player to move has lost
+        best_eval = float('-inf')
+        selected_move = None
 
-                beta = min(beta, child_eval)
-                if beta <= alpha:
+        for move in legal_moves:
+            if leaf_evals is not None:
+                child_eval = next(leaf_evals)
+
+            else:
+                make_move(move)
+                child_eval = -self._negamax(current_board, current_depth - 1, -beta, -alpha, ply + 1)[0]
+                undo_move()
+
+            # Keeping a move even if every move loses, so the table always has one to search first
+            if child_eval > best_eval or selected_move is None:
+                best_eval = child_eval
+                selected_move = move
+
+            alpha = max(alpha, child_eval)
+            if alpha >= beta:
+                self._move_orderer.record_cutoff(current_board, move, ply, current_depth)
+
+                if stats is not None:
+                    stats.record_cutoff(move == legal_moves[0])
+                break
+
+        # Scores outside of the search window are only bounds on the real score
+        if best_eval <= alpha_original:
+            bound = TranspositionTable.UPPER
+        elif best_eval >= beta_original:
+            bound = TranspositionTable.LOWER
+        else:
+            bound = TranspositionTable.EXACT
+
+        self._transposition_table.store(current_board.hash, current_depth, best_eval, bound, selected_move)
+
+        return best_eval, selected_move
+
+    def get_best_move(self, board: Board, depth: int or None = None, threads: int = 1, processes: int = 0,
+                      time_limit: float or None = None, max_depth: int or None = None, node_limit: int or None = None,
+                      stats: SearchStats or None = None):
+        """
+        Searches every root move to the given depth and returns (best move, best score). Root moves are split over a
+        pool of threads, or over worker processes when processes is above 0 (Which uses more than one core). How worker
+        processes search is set by the engine's parallel mode.
+
+        With a time limit (In seconds) or node limit, searches with iterative deepening instead: depth 1, 2, 3 ... up to
+        max_depth (Or depth), until the budget runs out. The result of the deepest search that finished is returned, and
+        depth 1 is always finished, so a move is returned however small the budget. Nodes searched by worker processes
+        are only counted against the node limit between depths. A max depth on its own searches with iterative deepening
+        to that depth. Raises ValueError if no depth or limit is given, or a depth or max depth below 1.
+
+        Given a SearchStats, fills it in with the counters and timings of this search (Which slows it down a little).
+        """
+        self._stats = stats
+
+        if stats is not None:
+            self._last_stats = stats
+            stats.start()
+
+            table_hits, table_misses = self._transposition_table.hits, self._transposition_table.misses
+            cache_hits, cache_misses = self._analysis_cache.hits, self._analysis_cache.misses
+
+        try:
+            return self._search(board, depth, threads, processes, time_limit, max_depth, node_limit)
+
+        finally:
+            if stats is not None:
+                stats.table_hits += self._transposition_table.hits - table_hits
+                stats.table_misses += self._transposition_table.misses - table_misses
+                stats.cache_hits += self._analysis_cache.hits - cache_hits
+                stats.cache_misses += self._analysis_cache.misses - cache_misses
+
+                stats.finish()
+
+            self._stats = None
+
+    def _search(self, board: Board, depth: int or None, threads: int, processes: int, time_limit: float or None,
+                max_depth: int or None, node_limit: int or None):
+        if depth is None and time_limit is None and node_limit is None and max_depth is None:
+            raise ValueError("A depth, max depth, time limit or node limit is needed to search")
+
+        if depth is not None and depth < 1:
+            raise ValueError(f"Depth must be at least 1, got {depth}")
+
+        if max_depth is not None and max_depth < 1:
+            raise ValueError(f"Max depth must be at least 1, got {max_depth}")
+
+        if time_limit is None and node_limit is None and max_depth is None:
+            best_move, best_score = self._search_root(board, depth, threads, processes)
+            self._finish_depth(depth, best_move, best_score, processes)
+
+            return self._decode(best_move), best_score
+
+        limits = SearchLimits(time_limit, node_limit)
+        if max_depth is None:
+            max_depth = depth if depth is not None else self.MAX_DEPTH
+
+        start_nodes = self._nodes
+        worker_nodes = 0
+
+        # Depth 1 is searched without the budget (Only any stop check that was already set), so there is always a move
+        # to return
+        best_move, best_score = self._search_root(board, 1, threads, processes)
+        worker_nodes += self.worker_nodes_searched if processes > 0 else 0
+        self._finish_depth(1, best_move, best_score, processes)
+
+        # Checking the budget at every node from here on, on top of any stop check that was already set
+        outer_stop_check = self._stop_check
+        self.set_stop_check(lambda: limits.exceeded(self._nodes - start_nodes + worker_nodes) or (
+            outer_stop_check is not None and outer_stop_check()
+        ))
+
+        try:
+            for current_depth in range(2, max_depth + 1):
+                if limits.exceeded(self._nodes - start_nodes + worker_nodes):
                     break
 
-            return min_eval, selected_move
+                try:
+                    # Earlier iterations left the principal variation in the transposition table, so it is searched first
+                    best_move, best_score = self._search_root(board, current_depth, threads, processes, limits)
+
+                except SearchAborted:
+                    break
+
+                finally:
+                    worker_nodes += self.worker_nodes_searched if processes > 0 else 0
+
+                self._finish_depth(current_depth, best_move, best_score, processes)
+
+        finally:
+            self.set_stop_check(outer_stop_check)
+
+        return self._decode(best_move), best_score
+
+    def _finish_depth(self, depth: int, best_move: int or None, best_score: float, processes: int) -> None:
+        if self._stats is not None:
+            worker_nodes = self.worker_nodes_searched if processes > 0 else 0
+            self._stats.finish_depth(depth, self._decode(best_move), best_score, worker_nodes)
+
+    @staticmethod
+    def _decode(move: int or None) -> MovePair or None:
+        return Board.decode_move(move) if move is not None else None
+
+    def _search_root(self, board: Board, depth: int, threads: int, processes: int, limits: SearchLimits or None = None):
+        """
+        Searches every root move to a fixed depth, returning (best move packed into an int, best score). Raises
+        SearchAborted if the search is stopped before it finishes.
+        """
+        # Worker processes can't see the stop check, so they are given the time that is left instead
+        time_limit = limits.remaining_time if limits is not None else None
+
+        if processes > 0 and self._parallel_mode == self.LAZY_SMP:
+            best_move, best_score = self._get_workers(processes).search(board, depth, time_limit)
+            self._store_root(board, depth, best_score, best_move)
+
+            return best_move, best_score
 
-    def get_best_move(self, board: Board, depth: int, threads: int = 1):
         def score_move(move):
-            child_board = board.get_mock(move, keep_metadata=True, keep_moves=True)
+            # Every root move gets its own board, since the search makes and undoes moves on it in place
+            child_board = board.copy(keep_metadata=True)
+            child_board.make_move_encoded(move)
+
+            return self._minimax(child_board, depth - 1, alpha, beta, 1)[0]
 
-            return self._minimax(child_board, depth - 1, alpha, beta)[0], move
+        # A best move from an earlier search of this position goes first
+        entry = self._transposition_table.probe(board.hash)
+        table_move = entry[4] if entry is not None else None
 
-        legal_moves = board.get_legal_moves()
-        legal_moves.sort(key=lambda m: self.analyze(board.get_mock(m)), reverse=board.current_player_turn == Board.BLACK)
+        legal_moves = self._move_orderer.order(board, board.get_legal_moves_encoded(), 0, table_move)
 
         is_maximizing = board.current_player_turn == Board.BLACK
 
@@ -76,17 +424,45 @@ class Engine:
         best_score = float('-inf') if is_maximizing else float('inf')
         best_move = None
 
-        with ThreadPoolExecutor(max_workers=threads) as executor:
-            futures = {executor.submit(score_move, move): move for move in legal_moves}
+        if processes > 0:
+            scores = self._get_workers(processes).score_children(board, legal_moves, depth - 1, time_limit)
 
-            for future in as_completed(futures):
-                score, move = future.result()
+        elif threads > 1:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                scores = list(executor.map(score_move, legal_moves))
 
-                if is_maximizing and score > best_score:
-                    best_score = score
-                    best_move = move
-                elif not is_maximizing and score < best_score:
-                    best_score = score
-                    best_move = move
+        else:
+            # Searched one after another, so every move after the first only has to be proven no better than the best
+            # so far. Those moves get bounds instead of exact scores, which never beat the best score below
+            scores = []
+            for move in legal_moves:
+                score = score_move(move)
+                scores.append(score)
+
+                if is_maximizing:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+
+        # Going through the moves in order, so ties are broken the same way no matter how the moves were searched
+        for move, score in zip(legal_moves, scores):
+            if is_maximizing and score > best_score:
+                best_score = score
+                best_move = move
+            elif not is_maximizing and score < best_score:
+                best_score = score
+                best_move = move
+
+        # Keeping a move even if every move loses
+        if best_move is None and len(legal_moves) > 0:
+            best_move = legal_moves[0]
+
+        self._store_root(board, depth, best_score, best_move)
 
         return best_move, best_score
+
+    def _store_root(self, board: Board, depth: int, best_score: float, best_move: int or None) -> None:
+        # The best root move is always searched with a window wide enough for its score to be exact. Table scores are
+        # from the point of view of the player to move
+        score = best_score if board.current_player_turn == Board.BLACK else -best_score
+        self._transposition_table.store(board.hash, depth, score, TranspositionTable.EXACT, best_move)
@@ -2,16 +2,40 @@ from pathlib import Path
 
 from shobu import Board
 
-from ..gui.util import MAIN_ENGINE_PROFILE, SAMPLE_PROFILE, ENGINE_PROFILES_DIRECTORY_PATH
-
-import math
-import os
+from ..gui.util import MAIN_ENGINE_PROFILE, MAIN_EVALUATION_TABLE, SAMPLE_PROFILE, ENGINE_PROFILES_DIRECTORY_PATH
+from .sub_board_table import SubBoardTable
 
 import numpy as np
 
 import json
 
 
+def _neighbor_table(offsets: list[tuple[int, int, int, int, int]]) -> np.ndarray:
+    return np.array([
+        [4 * (x + dx_mag) + y + dy_mag if 0 <= x + dx_mag < 4 and 0 <= y + dy_mag < 4 else 16
+         for dx_mag, dy_mag, _dx, _dy, _mag in offsets]
+        for x in range(4) for y in range(4)
+    ])
+
+
+def load_profile(profile_path: str = MAIN_ENGINE_PROFILE) -> dict[str, float]:
+    """
+    Returns the concept weights of an engine profile file. The main profile is created with the sample weights if it is
+    missing, any other profile has to exist.
+    """
+    _file_path = Path(profile_path)
+
+    # Checking to see if the main profile (And its folder) exists
+    if not _file_path.exists() and _file_path == Path(MAIN_ENGINE_PROFILE):
+        Path(ENGINE_PROFILES_DIRECTORY_PATH).mkdir(parents=True, exist_ok=True)
+
+        with open(_file_path, "w") as f:
+            json.dump(SAMPLE_PROFILE, f, indent=4, sort_keys=False)
+
+    with open(_file_path, "r") as f:
+        return json.load(f)
+
+
 class Analyze:
     _DIRECTIONS: list[tuple[int, int]] = [
         (-1,  1), (0,  1), (1,  1),
@@ -25,10 +49,38 @@ class Analyze:
         for mag in (1, 2)
     ]
 
+    # Flat index (4x + y) of the square at every direction and magnitude offset from every square, indexed
+    # [square][offset]. Offsets off the sub board point at an extra padding square
+    _NEIGHBORS: np.ndarray = _neighbor_table(_DIRECTION_MAG_OFFSETS)
+
+    # Value of the padding square, which never matches a piece or an empty square
+    _OFF_BOARD: int = 2
+
+    _COLORS:      np.ndarray = np.array([[Board.BLACK], [Board.WHITE]])
+    _COLOR_SIGNS: np.ndarray = np.array([1.0, -1.0])
+
+    # A piece times these is what an empty square, the same color and the other color match (Kinds of connection)
+    _MATCH_SIGNS: np.ndarray = np.array([0, 1, -1]).reshape(3, 1, 1)
+
+    # What a connection counts for at magnitude 1 and 2
+    _MOBILITY_STEPS:   tuple[float, float] = (0.5, 1.0)
+    _SUPPORT_STEPS:    tuple[float, float] = (1.0, 0.25)
+    _AGGRESSION_STEPS: tuple[float, float] = (1.0, 0.35)
+
+    # Most connections one color can have at one magnitude on a sub board (Every square, in every direction), which
+    # sizes the term tables
+    _MAX_CONNECTIONS: int = 16 * 8
+
+    # Most sub board values remembered by analyze_incremental before it starts over
+    SUB_BOARD_CACHE_SIZE: int = 1 << 18
+
     BLACK_WIN: float = float('inf')
     WHITE_WIN: float = float('-inf')
 
-    def __init__(self, concept_weights: dict[str, float] or None):
+    def __init__(self, concept_weights: dict[str, float] or None, sub_board_table_path: str or None = MAIN_EVALUATION_TABLE):
+        # Precomputed sub board values, used by analyze_incremental if the file there was made for these weights
+        self._sub_board_table_path: str or None = sub_board_table_path
+
         self._concept_weights: [str, float] = {
             "Material":   1.0,
             "Support":    1.0,
@@ -40,21 +92,7 @@ class Analyze:
             self.set_concept_weights(concept_weights)
 
         else:
-            _dir = Path(ENGINE_PROFILES_DIRECTORY_PATH)
-            _file_path = Path(MAIN_ENGINE_PROFILE)
-
-            # Checking folder path
-            if not _dir.exists():
-                os.mkdir(_dir)
-
-            # Checking to see if directory exists
-            if not _file_path.exists():
-                with open(_file_path, "w") as f:
-                    json.dump(SAMPLE_PROFILE, f, indent=4, sort_keys=False)
-
-            # Get Color Dictionary
-            with open(_file_path, "r") as f:
-                self._concept_weights: dict = json.load(f)
+            self.set_concept_weights(load_profile())
 
 
     def set_concept_weights(self, concept_weights: dict[str, float]):
@@ -65,96 +103,207 @@ class Analyze:
             "Aggression": concept_weights["Aggression"]
         }
 
-    @staticmethod
-    def _on_board(x, y):
-        return x in range(0, 4) and y in range(0, 4)
-
-    def _material_equation(self, n) -> float:
-        return (math.log(6 * (n - 0.85))) * self._concept_weights["Material"]
-
-    def _support_equation(self, n) -> float:
-        return (0.75 * (n / 1.5) ** .5) * self._concept_weights["Support"]
-
-    def _mobility_equation(self, n) -> float:
-        if 0 <= n <= 2:
-            return (2 * ((n / 2) ** 2) * (3 - 2 * (n / 2))) * self._concept_weights["Mobility"]
-        else:
-            return (0.5 * math.sqrt(n - 1) + 1.5) * self._concept_weights["Mobility"]
+        self._build_tables()
+
+    def _build_tables(self) -> None:
+        """
+        Tabulates every weighted term equation over every count it can be given, so evaluating is only lookups.
+        """
+        # Indexed by piece count (No pieces is a win, so that entry is never used)
+        self._material_table: np.ndarray = np.concatenate(([0.0], self._material_equation(np.arange(1, 17))))
+
+        # Indexed by mag 1 count + 2 * mag 2 count (Twice the mobility)
+        mobility_counts = np.arange(3 * self._MAX_CONNECTIONS + 1)
+        self._mobility_table: np.ndarray = self._mobility_equation(
+            self._combine(mobility_counts % 2, mobility_counts // 2, self._MOBILITY_STEPS)
+        )
+
+        # Indexed by 4 * mag 1 count + mag 2 count (Four times the support)
+        support_counts = np.arange(5 * self._MAX_CONNECTIONS + 1)
+        self._support_table: np.ndarray = self._support_equation(
+            self._combine(support_counts // 4, support_counts % 4, self._SUPPORT_STEPS)
+        )
+
+        # Indexed [mag 1 count][mag 2 count], since 0.35 steps can't be turned into whole numbers
+        aggression_counts = np.arange(self._MAX_CONNECTIONS + 1)
+        self._aggression_table: np.ndarray = self._aggression_equation(
+            self._combine(aggression_counts[:, None], aggression_counts[None, :], self._AGGRESSION_STEPS)
+        )
+
+        # Sub board values were worked out with the old tables, so boards holding them are told to start over through a
+        # new key, and remembered values are dropped
+        self._tables_key: object = object()
+        self._sub_board_cache: dict[int, float] = {}
+
+        # The precomputed table is only loaded once a sub board has to be valued, and checked again after every change
+        self._sub_board_table: SubBoardTable or None = None
+        self._sub_board_table_loaded: bool = False
 
-    def _aggression_equation(self, n) -> float:
-        return (0.35 * (n ** 0.5)) * self._concept_weights["Aggression"]
+    @staticmethod
+    def _combine(mag_1_counts: np.ndarray, mag_2_counts: np.ndarray, steps: tuple[float, float]) -> np.ndarray:
+        """
+        What connection counts at magnitude 1 and 2 add up to. Tables and closed form terms both go through here, so
+        both round the same way.
+        """
+        return mag_1_counts * steps[0] + mag_2_counts * steps[1]
+
+    @property
+    def concept_weights(self) -> dict[str, float]:
+        return self._concept_weights.copy()
+
+    def _material_equation(self, n):
+        return np.log(6 * (n - 0.85)) * self._concept_weights["Material"]
+
+    def _support_equation(self, n):
+        return (0.75 * np.sqrt(n / 1.5)) * self._concept_weights["Support"]
+
+    def _mobility_equation(self, n):
+        # Smooth step up to 2, then square root growth (Clamped so the unused branch never takes a negative root)
+        return np.where(
+            n <= 2,
+            2 * ((n / 2) ** 2) * (3 - 2 * (n / 2)),
+            0.5 * np.sqrt(np.maximum(n - 1, 0)) + 1.5
+        ) * self._concept_weights["Mobility"]
+
+    def _aggression_equation(self, n):
+        return (0.35 * np.sqrt(n)) * self._concept_weights["Aggression"]
 
     def analyze(self, board: Board) -> float:
-        total_eval: float = 0
-
-        for sub_board_key in board.boards:
-            sub_board: np.array = board.boards[sub_board_key]
-
-            # Basic tracking of how many pieces are on a board (Material)
-            piece_ratio: list[int] = [0, 0]
-
-            piece_ratio[0] = np.sum(sub_board == Board.BLACK)
-            piece_ratio[1] = np.sum(sub_board == Board.WHITE)
+        if board.is_terminal:
+            return self._win_score(board)
 
-            if piece_ratio[0] == 0 or piece_ratio[1] == 0:
-                return self.WHITE_WIN if piece_ratio[0] == 0 else self.BLACK_WIN
+        return float(self.analyze_many(board.to_array()[None])[0])
 
-            # Tracking total amount of connections (Support, Aggression)
-            support_connections: list[int] = [0, 0]
-            aggressive_connections: list[int] = [0, 0]
+    def _win_score(self, board: Board) -> float:
+        """
+        Score of a finished game, the same one its sub boards would give (The board missing a color decides it).
+        """
+        return self.BLACK_WIN if board.winner == Board.BLACK else self.WHITE_WIN
 
-            # Tracking mobility
-            white_mobility: dict[tuple[int, int], float] = {}
-            black_mobility: dict[tuple[int, int], float] = {}
-            for direction in self._DIRECTIONS:
-                white_mobility[direction] = 0.0
-                black_mobility[direction] = 0.0
+    def analyze_many(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Scores a batch of positions in one pass. Takes an (N, 4, 4, 4) int8 array of positions laid out like
+        Board.to_array() (Such as from Board.get_children_array()), and returns their N scores.
+        """
+        count = len(positions)
 
-            # Scanning squares
-            for x in range(4):
-                for y in range(4):
-                    # Getting piece and checking if square is emtpy
-                    piece = sub_board[x][y]
-                    if piece == Board.NONE:
-                        continue
+        values = self._sub_board_values(positions.reshape(4 * count, 16)).reshape(count, 4)
 
-                    # Checking affiliations with directions and magnitudes (Aggression, Mobility, Support)
-                    for dx_mag, dy_mag, dx, dy, mag in self._DIRECTION_MAG_OFFSETS:
-                        x2, y2 = x + dx_mag, y + dy_mag
+        # The first sub board missing a color decides the game
+        decided = np.isinf(values)
+        if not decided.any():
+            return values.sum(axis=1)
 
-                        # Moving on if location is out of the sub board
-                        if not Analyze._on_board(x2, y2):
-                            continue
+        first_board = decided.argmax(axis=1)
 
-                        new_piece = sub_board[x2][y2]
+        return np.where(decided.any(axis=1), values[np.arange(count), first_board],
+                        np.where(decided, 0.0, values).sum(axis=1))
 
-                        # Checking for mobility
-                        if new_piece == Board.NONE:
-                            if piece == Board.BLACK:
-                                black_mobility[(dx, dy)] += 0.5 if mag == 1 else 1
+    def analyze_incremental(self, board: Board) -> float:
+        """
+        Scores a position from values kept on the board for each sub board, so only the sub boards changed since the
+        last evaluation of this board (Or of a position it was reached from) are worked out again. Gives exactly the
+        same scores as analyze.
+        """
+        if board.is_terminal:
+            return self._win_score(board)
 
-                            else:
-                                white_mobility[(dx, dy)] += 0.5 if mag == 1 else 1
+        values = board.get_sub_board_values(self._tables_key)
 
-                        # Checking for support
-                        if new_piece == piece:
-                            support_connections[0 if piece == Board.BLACK else 1] += 1 if mag == 1 else 0.25
+        if None in values:
+            black_masks, white_masks = board.piece_masks
 
-                        # Checking for aggression
-                        if new_piece == - piece:
-                            aggressive_connections[0 if piece == Board.BLACK else 1] += 1 if mag == 1 else 0.35
+            for i in range(4):
+                if values[i] is None:
+                    values[i] = self._sub_board_value(black_masks[i], white_masks[i])
 
-            # Calculating the weight of material
-            total_eval += self._material_equation(piece_ratio[0]) - self._material_equation(piece_ratio[1])
+        # The first sub board missing a color decides the game
+        total_eval = 0.0
+        for value in values:
+            if value == self.BLACK_WIN or value == self.WHITE_WIN:
+                return value
 
-            # Accounting for mobility
-            for direction in self._DIRECTIONS:
-                total_eval += self._mobility_equation(black_mobility[direction]) - self._mobility_equation(white_mobility[direction])
-
-            # Accounting for Aggression
-            total_eval += self._aggression_equation(aggressive_connections[0]) - self._aggression_equation(aggressive_connections[1])
-
-            # Accounting for support
-            total_eval += self._support_equation(support_connections[0]) - self._support_equation(support_connections[1])
+            total_eval += value
 
         return total_eval
+
+    def _sub_board_value(self, black: int, white: int) -> float:
+        """
+        Black minus white value of one sub board, remembered by its masks. Taken from the precomputed table if there is
+        one, otherwise worked out.
+        """
+        key = black << 16 | white
+
+        value = self._sub_board_cache.get(key)
+        if value is None:
+            if not self._sub_board_table_loaded:
+                self._sub_board_table_loaded = True
+
+                if self._sub_board_table_path is not None:
+                    self._sub_board_table = SubBoardTable.load(self._sub_board_table_path, self._concept_weights)
+
+            if self._sub_board_table is not None:
+                value = self._sub_board_table.get(black, white)
+
+            # Working the value out if there is no table for these weights, or the sub board isn't in it
+            if value is None:
+                pieces = Board.masks_to_array(np.array([black]), np.array([white])).reshape(1, 16)
+                value = float(self._sub_board_values(pieces)[0])
+
+            # There are millions of possible sub boards, so the cache starts over instead of growing without bound
+            if len(self._sub_board_cache) >= self.SUB_BOARD_CACHE_SIZE:
+                self._sub_board_cache.clear()
+
+            self._sub_board_cache[key] = value
+
+        return value
+
+    def _sub_board_values(self, pieces: np.ndarray) -> np.ndarray:
+        """
+        Black minus white value of each of a batch of sub boards, given as an (M, 16) array of pieces with squares
+        flattened as 4x + y. Sub boards missing black are WHITE_WIN, and ones missing white are BLACK_WIN.
+        """
+        count = len(pieces)
+
+        # Squares holding each color, indexed [sub board][black, white][square]
+        colors = pieces[:, None, :] == self._COLORS
+
+        # Basic tracking of how many pieces are on a board (Material)
+        piece_counts = colors.sum(axis=2)
+
+        # Piece at every offset from every square, indexed [sub board][square][offset] (Off board reads as _OFF_BOARD)
+        padded = np.concatenate((pieces, np.full((count, 1), self._OFF_BOARD, dtype=np.int8)), axis=1)
+        neighbors = padded[:, self._NEIGHBORS]
+
+        # Offsets holding an empty square, the same color and the other color, indexed [sub board][kind][square][offset]
+        matches = neighbors[:, None] == pieces[:, None, :, None] * self._MATCH_SIGNS
+
+        # Connections of every kind by color, direction and magnitude, indexed [sub board][kind][color][direction]
+        # [magnitude]
+        connections = (colors[:, None].astype(np.float64) @ matches).astype(np.intp).reshape(count, 3, 2, 8, 2)
+
+        # Mobility is per direction, support and aggression are totals over every direction
+        terms = self._term_values(piece_counts, connections[:, 0], connections[:, 1].sum(axis=2),
+                                  connections[:, 2].sum(axis=2))
+
+        # Every term for black minus the same term for white
+        values = terms[:, 0] - terms[:, 1]
+
+        missing = piece_counts == 0
+        if missing.any():
+            values = np.where(missing[:, 0], self.WHITE_WIN, np.where(missing[:, 1], self.BLACK_WIN, values))
+
+        return values
+
+    def _term_values(self, piece_counts: np.ndarray, mobility: np.ndarray, support: np.ndarray,
+                     aggression: np.ndarray) -> np.ndarray:
+        """
+        Sums every weighted term per sub board and color, looked up from the tables. Connection counts have magnitude 1
+        and 2 counts along their last axis, and mobility has a direction axis before that.
+        """
+        return (
+            self._material_table[piece_counts] +
+            self._mobility_table[mobility[..., 0] + 2 * mobility[..., 1]].sum(axis=-1) +
+            self._aggression_table[aggression[..., 0], aggression[..., 1]] +
+            self._support_table[4 * support[..., 0] + support[..., 1]]
+        )
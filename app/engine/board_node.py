@@ -18,13 +18,17 @@ class BoardNode:
 
     @staticmethod
     def generate_from_board(board: Board, board_eval: float, keep_metadata: bool = False, keep_moves: bool = False):
-        node = BoardNode(board.serialized_string, board_eval)
-        node.board = board.copy(keep_metadata=keep_metadata, keep_moves=keep_moves)
+        return BoardNode(board.copy(keep_metadata=keep_metadata, keep_moves=keep_moves), board_eval)
 
-        return node
+    @property
+    def hash(self) -> int:
+        return self.board.hash
 
     def __eq__(self, other: Self):
-        return self.serial == other.serial
+        return self.hash == other.hash
+
+    def __hash__(self):
+        return self.hash
 
     def __str__(self):
         return f"Turn: {self.board.current_player_turn} | Moves: {self.board.turn_number}\n{self.board}\nEval: {self.eval}"
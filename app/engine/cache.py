@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class EvaluationCache:
+    """
+    Bounded cache of position evaluations keyed by Zobrist hash. When full, the least recently used evaluation is evicted.
+    Access is locked, so one cache can be shared by the threads of a search.
+    """
+    # Approximate memory used by one cached evaluation (Hash, score, and the ordered dict's bookkeeping)
+    ENTRY_SIZE: int = 168
+
+    def __init__(self, max_entries: int = 200_000):
+        self._max_entries: int = max(1, max_entries)
+
+        self._entries: OrderedDict[int, float] = OrderedDict()
+        self._lock = Lock()
+
+        # Statistics
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @classmethod
+    def from_size_mb(cls, size_mb: float):
+        return cls(int(size_mb * 1024 * 1024) // cls.ENTRY_SIZE)
+
+    def get(self, key: int) -> float or None:
+        with self._lock:
+            value = self._entries.get(key)
+
+            if value is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def put(self, key: int, value: float) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+            self.hits = self.misses = self.evictions = 0
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "Entries": len(self._entries),
+            "Hits": self.hits,
+            "Misses": self.misses,
+            "Evictions": self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: int):
+        return key in self._entries
@@ -0,0 +1,29 @@
+import time
+
+
+class SearchAborted(Exception):
+    """
+    Raised inside a search once its stop check returns True. Nodes the search was in the middle of are not stored.
+    """
+
+
+class SearchLimits:
+    """
+    Wall clock and node budget of a search. Either can be None for no limit.
+    """
+    def __init__(self, time_limit: float or None = None, node_limit: int or None = None):
+        self.deadline: float or None = time.perf_counter() + time_limit if time_limit is not None else None
+        self.node_limit: int or None = node_limit
+
+    @property
+    def remaining_time(self) -> float or None:
+        if self.deadline is None:
+            return None
+
+        return max(0.0, self.deadline - time.perf_counter())
+
+    def exceeded(self, nodes: int) -> bool:
+        if self.node_limit is not None and nodes >= self.node_limit:
+            return True
+
+        return self.deadline is not None and time.perf_counter() >= self.deadline
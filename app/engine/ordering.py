@@ -0,0 +1,98 @@
+from shobu import Board
+
+
+class MoveOrderer:
+    """
+    Orders the moves of a node before they are searched. This base orderer only puts the transposition table's move
+    first, leaving the rest in generation order. Subclasses can score moves however they like, and hear about every
+    move that caused a cutoff. Moves are packed ints (See Board.encode_move).
+    """
+    def order(self, board: Board, moves: list[int], ply: int, table_move: int or None) -> list[int]:
+        if table_move is not None:
+            for i in range(len(moves)):
+                if moves[i] == table_move:
+                    moves.insert(0, moves.pop(i))
+                    break
+
+        return moves
+
+    def record_cutoff(self, board: Board, move: int, ply: int, depth: int) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+class HeuristicMoveOrderer(MoveOrderer):
+    """
+    Orders moves as: the transposition table's move, moves pushing a piece off the board, other pushes, killer moves
+    (Quiet moves that caused a cutoff at the same ply), then everything else by history score.
+    History scores are indexed by (board, from, to) and count for both halves of a move.
+    """
+    KILLERS_PER_PLY: int = 2
+
+    # Score bands, set far enough apart that history scores can't reach the band above them
+    _TABLE_MOVE_SCORE: int = 1 << 62
+    _PUSH_OFF_SCORE:   int = 1 << 61
+    _PUSH_SCORE:       int = 1 << 60
+    _KILLER_SCORE:     int = 1 << 59
+
+    def __init__(self):
+        # Killer moves for each ply, most recent first
+        self._killers: list[list[int]] = []
+
+        # Indexed [board][from square][to square]
+        self._history: list[list[list[int]]] = [[[0] * 16 for _ in range(16)] for _ in range(4)]
+
+    def _score(self, board: Board, code: int, killers: list[int]) -> int:
+        push_type = board.get_push_type_encoded(code)
+
+        if push_type == Board.PUSH_OFF:
+            return self._PUSH_OFF_SCORE
+
+        if push_type == Board.PUSH_ON_BOARD:
+            return self._PUSH_SCORE
+
+        if code in killers:
+            return self._KILLER_SCORE - killers.index(code)
+
+        # Passive half (Bits 10-19), then aggressive half (Bits 0-9), of the move
+        return (
+            self._history[code >> 18][code >> 14 & 0xF][code >> 10 & 0xF] +
+            self._history[code >> 8 & 0x3][code >> 4 & 0xF][code & 0xF]
+        )
+
+    def order(self, board: Board, moves: list[int], ply: int, table_move: int or None) -> list[int]:
+        killers = self._killers[ply] if ply < len(self._killers) else []
+
+        scored = []
+        for move in moves:
+            score = self._TABLE_MOVE_SCORE if move == table_move else self._score(board, move, killers)
+
+            scored.append((score, move))
+
+        # Sorting on the score only, keeping generation order between equal scores
+        scored.sort(key=lambda scored_move: scored_move[0], reverse=True)
+
+        return [move for _score, move in scored]
+
+    def record_cutoff(self, board: Board, code: int, ply: int, depth: int) -> None:
+        # Pushes are already searched early, so only quiet moves are remembered
+        if board.get_push_type_encoded(code) != Board.PUSH_NONE:
+            return
+
+        while len(self._killers) <= ply:
+            self._killers.append([])
+
+        killers = self._killers[ply]
+        if code not in killers:
+            killers.insert(0, code)
+            del killers[self.KILLERS_PER_PLY:]
+
+        # Deeper cutoffs save more work, so they count for more
+        self._history[code >> 18][code >> 14 & 0xF][code >> 10 & 0xF] += depth * depth
+        self._history[code >> 8 & 0x3][code >> 4 & 0xF][code & 0xF] += depth * depth
+
+    def clear(self) -> None:
+        self._killers = []
+        self._history = [[[0] * 16 for _ in range(16)] for _ in range(4)]
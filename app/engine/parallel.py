@@ -0,0 +1,203 @@
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from shobu import Board
+
+from .limits import SearchAborted
+from .transposition import SharedTranspositionTable
+
+
+# Bytes at the start of a pool's shared memory before its transposition table (Stop flag, padded to keep the table aligned)
+_HEADER_SIZE: int = 8
+
+# Each worker process keeps its own engine (And with it its own evaluation cache)
+_worker_engine = None
+
+# Shared memory block holding the pool's stop flag (And the shared transposition table for Lazy SMP), kept open by workers
+_worker_memory: shared_memory.SharedMemory or None = None
+
+
+def _init_worker(concept_weights: dict[str, float], table_size_mb: float, cache_size_mb: float, memory_name: str,
+                 share_table: bool) -> None:
+    global _worker_engine, _worker_memory
+
+    # Imported here, since the engine package imports this module
+    from . import Engine
+
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    stop_flag = np.ndarray((1,), dtype=np.uint8, buffer=_worker_memory.buf)
+
+    # With a shared table the engine's own one is left as small as possible, since the shared one replaces it
+    _worker_engine = Engine(table_size_mb=0 if share_table else table_size_mb, cache_size_mb=cache_size_mb,
+                            concept_weights=concept_weights)
+    _worker_engine.set_stop_check(lambda: stop_flag[0] != 0)
+
+    if share_table:
+        _worker_engine._transposition_table = SharedTranspositionTable(_worker_memory.buf[_HEADER_SIZE:], table_size_mb)
+
+
+def _search_position(position: bytes, depth: int) -> tuple[float or None, int or None, int]:
+    """
+    Searches a position to a depth, returning (score, best move packed into an int, nodes searched). Score and move are
+    None if the search was stopped before it finished.
+    """
+    start_nodes = _worker_engine.nodes_searched
+
+    try:
+        score, best_move = _worker_engine._minimax(Board.from_bytes(position), depth, float('-inf'), float('inf'))
+
+    except SearchAborted:
+        score, best_move = None, None
+
+    return score, best_move, _worker_engine.nodes_searched - start_nodes
+
+
+def _release_pool(executor: ProcessPoolExecutor, memory: shared_memory.SharedMemory) -> None:
+    """
+    Stops a pool's workers and removes its shared memory. Runs when the pool is shut down, garbage collected, or still
+    open at exit.
+    """
+    executor.shutdown(cancel_futures=True)
+
+    memory.unlink()
+
+    # At exit the pool's stop flag can still hold a view of the memory, which is then unmapped with the process instead
+    try:
+        memory.close()
+    except BufferError:
+        pass
+
+
+class _WorkerPool:
+    """
+    Worker processes started once and reused between searches. Positions are sent to them packed by Board.to_bytes, and
+    running searches are stopped through a flag at the start of a block of shared memory. The workers and memory are
+    released by shutdown, or once the pool is garbage collected or the interpreter exits if it never is.
+    """
+    def __init__(self, processes: int, concept_weights: dict[str, float], table_size_mb: float, cache_size_mb: float,
+                 share_table: bool):
+        self._processes: int = processes
+
+        table_size = SharedTranspositionTable.buffer_size(table_size_mb) if share_table else 0
+        self._memory = shared_memory.SharedMemory(create=True, size=_HEADER_SIZE + table_size)
+        self._stop_flag = np.ndarray((1,), dtype=np.uint8, buffer=self._memory.buf)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(concept_weights, table_size_mb, cache_size_mb, self._memory.name, share_table)
+        )
+
+        self._finalizer = weakref.finalize(self, _release_pool, self._executor, self._memory)
+
+        # Nodes searched by the workers in the last search
+        self.last_nodes: int = 0
+
+    def _stop(self, futures: set[Future]) -> None:
+        """
+        Stops the workers searching the given futures, and waits for them to return.
+        """
+        self._stop_flag[0] = 1
+        wait(futures)
+
+        self._stop_flag[0] = 0
+
+    def shutdown(self) -> None:
+        # The flag's view has to be released before the shared memory can be closed
+        del self._stop_flag
+        self._finalizer()
+
+    @property
+    def processes(self) -> int:
+        return self._processes
+
+
+class RootSplitter(_WorkerPool):
+    """
+    Pool of worker processes that search root moves in parallel, each with its own transposition table.
+    """
+    def __init__(self, processes: int, concept_weights: dict[str, float], table_size_mb: float, cache_size_mb: float):
+        super().__init__(processes, concept_weights, table_size_mb, cache_size_mb, share_table=False)
+
+    def score_children(self, board: Board, moves: list[int], depth: int, time_limit: float or None = None) -> list[float]:
+        """
+        Returns the score of the position after each packed move searched to the given depth, in the same order as the moves.
+        Moves are handed out in order, so the best ordered moves are searched first. Raises SearchAborted if the time
+        limit (In seconds) runs out first.
+        """
+        child_board = board.copy()
+
+        futures = []
+        for move in moves:
+            child_board.make_move_encoded(move)
+            futures.append(self._executor.submit(_search_position, child_board.to_bytes(), depth))
+            child_board.undo_move()
+
+        _done, pending = wait(futures, timeout=time_limit)
+        if pending:
+            self._stop(pending)
+
+        results = [future.result() for future in futures]
+        self.last_nodes = sum(nodes for _score, _move, nodes in results)
+
+        if pending:
+            raise SearchAborted
+
+        return [score for score, _move, _nodes in results]
+
+
+class LazySMP(_WorkerPool):
+    """
+    Pool of worker processes that all search the same root, sharing one transposition table held in shared memory.
+    Every other worker searches one ply deeper so they fill the table ahead of each other, and the first result at the
+    requested depth or deeper is used. The rest are then stopped. The table is as large as the engine's own, so close the
+    engine (Or use it in a with block) to release it as soon as it is no longer needed.
+    """
+    def __init__(self, processes: int, concept_weights: dict[str, float], table_size_mb: float, cache_size_mb: float):
+        super().__init__(processes, concept_weights, table_size_mb, cache_size_mb, share_table=True)
+
+        # Depth of the result of the last search
+        self.last_depth: int = 0
+
+    def search(self, board: Board, depth: int, time_limit: float or None = None) -> tuple[int or None, float]:
+        """
+        Returns (best move packed into an int, best score) of the deepest search that finished first. Raises SearchAborted if the time
+        limit (In seconds) runs out first.
+        """
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+
+        position = board.to_bytes()
+        depths = {
+            self._executor.submit(_search_position, position, depth + i % 2): depth + i % 2 for i in range(self._processes)
+        }
+
+        best = None
+        pending = set(depths)
+        while pending and best is None:
+            timeout = max(0.0, deadline - time.perf_counter()) if deadline is not None else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            # Nothing finishing before the deadline means the time has run out
+            if not done:
+                break
+
+            for future in done:
+                score, best_move, _nodes = future.result()
+
+                if score is not None and (best is None or depths[future] > best[0]):
+                    best = (depths[future], score, best_move)
+
+        # Stopping the workers that are still searching
+        self._stop(pending)
+        self.last_nodes = sum(future.result()[2] for future in depths)
+
+        if best is None:
+            raise SearchAborted
+
+        self.last_depth = best[0]
+
+        return best[2], best[1]
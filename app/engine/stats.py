@@ -0,0 +1,199 @@
+import time
+from typing import Callable
+
+
+class SearchStats:
+    """
+    Counters and timings of one search, filled in by Engine.get_best_move when it is given one. Nodes and phase times
+    are only counted in this process (Worker processes add their node count at the end of each depth), and threads of a
+    search share the same counters, so those counts can be slightly off with threads.
+
+    A progress callback gets this object once every depth finishes, and every progress interval (In seconds) while one
+    is being searched.
+    """
+    # Parts of a node that are timed
+    MOVE_GENERATION: str = "Move generation"
+    ORDERING:        str = "Ordering"
+    MAKE_UNDO:       str = "Make / undo"
+    EVALUATION:      str = "Evaluation"
+
+    PHASES: tuple[str, ...] = (MOVE_GENERATION, ORDERING, MAKE_UNDO, EVALUATION)
+
+    # Timing histograms have one bucket per power of two microseconds, the last one taking everything longer
+    HISTOGRAM_BUCKETS: int = 16
+
+    # Nodes searched between checks of whether progress is due
+    _PROGRESS_CHECK_NODES: int = 1024
+
+    def __init__(self, progress_callback: Callable[["SearchStats"], None] or None = None,
+                 progress_interval: float = 0.25):
+        self._progress_callback: Callable[[SearchStats], None] or None = progress_callback
+        self._progress_interval: float = progress_interval
+        self._last_progress: float = 0.0
+        self._next_progress_check: int = self._PROGRESS_CHECK_NODES
+
+        self.start_time: float = 0.0
+        self.end_time: float or None = None
+
+        self.nodes: int = 0
+        self.leaf_nodes: int = 0
+        self.worker_nodes: int = 0
+
+        # Nodes that generated moves, the moves they generated, and the ones that were cut off (And how many of those
+        # were cut off by the first move searched)
+        self.expanded_nodes: int = 0
+        self.moves_generated: int = 0
+        self.cutoffs: int = 0
+        self.first_move_cutoffs: int = 0
+
+        # Transposition table and evaluation cache lookups made by this search
+        self.table_hits: int = 0
+        self.table_misses: int = 0
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+
+        # Nodes at every ply from the root
+        self.ply_nodes: list[int] = []
+
+        # Deepest finished depth, and its result
+        self.depth: int = 0
+        self.best_move = None
+        self.best_score: float or None = None
+
+        # Nodes and seconds spent on each finished depth (Iterative deepening finishes one after another)
+        self.depth_nodes: dict[int, int] = {}
+        self.depth_times: dict[int, float] = {}
+
+        self.phase_times: dict[str, float] = {phase: 0.0 for phase in self.PHASES}
+        self.phase_histograms: dict[str, list[int]] = {phase: [0] * self.HISTOGRAM_BUCKETS for phase in self.PHASES}
+
+        self._depth_start_time: float = 0.0
+        self._depth_start_nodes: int = 0
+
+    def start(self) -> None:
+        self.start_time = self._last_progress = self._depth_start_time = time.perf_counter()
+
+    def finish(self) -> None:
+        self.end_time = time.perf_counter()
+
+    def enter_node(self, ply: int, count: int = 1) -> None:
+        """
+        Counts nodes searched at a ply, and reports progress if it is due.
+        """
+        self.nodes += count
+
+        while len(self.ply_nodes) <= ply:
+            self.ply_nodes.append(0)
+        self.ply_nodes[ply] += count
+
+        if self._progress_callback is not None and self.nodes >= self._next_progress_check:
+            self._next_progress_check = self.nodes + self._PROGRESS_CHECK_NODES
+            now = time.perf_counter()
+
+            if now - self._last_progress >= self._progress_interval:
+                self._last_progress = now
+                self._progress_callback(self)
+
+    def record_expansion(self, move_count: int) -> None:
+        self.expanded_nodes += 1
+        self.moves_generated += move_count
+
+    def record_cutoff(self, first_move: bool) -> None:
+        self.cutoffs += 1
+        self.first_move_cutoffs += first_move
+
+    def record_phase(self, phase: str, seconds: float) -> None:
+        self.phase_times[phase] += seconds
+
+        microseconds = int(seconds * 1e6)
+        self.phase_histograms[phase][min(microseconds.bit_length(), self.HISTOGRAM_BUCKETS - 1)] += 1
+
+    def timed(self, phase: str, function: Callable, *args):
+        """
+        Calls a function, adding the time it took to a phase, and returns its result.
+        """
+        start = time.perf_counter()
+        result = function(*args)
+        self.record_phase(phase, time.perf_counter() - start)
+
+        return result
+
+    def finish_depth(self, depth: int, best_move, best_score: float, worker_nodes: int = 0) -> None:
+        """
+        Records a finished depth and its result, and reports progress.
+        """
+        now = time.perf_counter()
+        self.worker_nodes += worker_nodes
+
+        self.depth = depth
+        self.best_move = best_move
+        self.best_score = best_score
+
+        self.depth_nodes[depth] = self.total_nodes - self._depth_start_nodes
+        self.depth_times[depth] = now - self._depth_start_time
+
+        self._depth_start_nodes = self.total_nodes
+        self._depth_start_time = now
+
+        if self._progress_callback is not None:
+            self._last_progress = now
+            self._progress_callback(self)
+
+    @property
+    def total_nodes(self) -> int:
+        return self.nodes + self.worker_nodes
+
+    @property
+    def elapsed(self) -> float:
+        return (self.end_time if self.end_time is not None else time.perf_counter()) - self.start_time
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.total_nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def branching_factor(self) -> float:
+        """
+        Average legal moves of the nodes that generated moves.
+        """
+        return self.moves_generated / self.expanded_nodes if self.expanded_nodes else 0.0
+
+    @property
+    def cutoff_rate(self) -> float:
+        return self.cutoffs / self.expanded_nodes if self.expanded_nodes else 0.0
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """
+        Share of cutoffs made by the first move searched, which is how often move ordering got it right.
+        """
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def table_hit_rate(self) -> float:
+        probes = self.table_hits + self.table_misses
+        return self.table_hits / probes if probes else 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def __str__(self):
+        lines = [
+            f"Depth {self.depth}  Score {self.best_score}  Nodes {self.total_nodes}  Time {self.elapsed:.3f}s  "
+            f"NPS {self.nodes_per_second:.0f}",
+            f"Branching factor {self.branching_factor:.1f}  Cutoff rate {self.cutoff_rate:.1%}  "
+            f"First move cutoffs {self.first_move_cutoff_rate:.1%}",
+            f"Table hit rate {self.table_hit_rate:.1%}  Evaluation cache hit rate {self.cache_hit_rate:.1%}",
+        ]
+
+        lines += [
+            f"Depth {depth}: {self.depth_nodes[depth]} nodes in {self.depth_times[depth]:.3f}s" for depth in self.depth_nodes
+        ]
+
+        lines += [
+            f"{phase:<16} {self.phase_times[phase]:.3f}s ({sum(self.phase_histograms[phase])} calls)" for phase in self.PHASES
+        ]
+
+        return "\n".join(lines)
@@ -0,0 +1,185 @@
+"""
+Precomputed values of every sub board a game can reach (Up to 4 pieces of each color), for one weight profile.
+
+Generate the table for the main profile with: python main.py generate-table
+"""
+import struct
+from math import comb
+from pathlib import Path
+
+import numpy as np
+
+from shobu import Board
+
+from ..gui.util import MAIN_ENGINE_PROFILE, MAIN_EVALUATION_TABLE
+
+
+# Most pieces of one color a sub board can hold in a game
+_MAX_PIECES: int = 4
+
+_ALL_MASKS: np.ndarray = np.arange(1 << 16)
+_PIECE_COUNTS: np.ndarray = sum(_ALL_MASKS >> bit & 1 for bit in range(16))
+
+# Masks with each number of pieces in increasing order. That is also colexicographic order, so a mask's position among
+# them (Its rank) doesn't depend on how many squares it is spread over
+_MASKS_BY_COUNT: list[np.ndarray] = [np.flatnonzero(_PIECE_COUNTS == count) for count in range(_MAX_PIECES + 1)]
+
+
+def _ranks() -> list[int]:
+    """
+    Rank of every mask among the masks with the same number of pieces, indexed by mask.
+    """
+    ranks = np.zeros(1 << 16, dtype=np.int64)
+    for masks in _MASKS_BY_COUNT:
+        ranks[masks] = np.arange(len(masks))
+
+    return ranks.tolist()
+
+
+def _packed_bits() -> list[int]:
+    """
+    Bits of a byte picked out by a byte mask and packed together, indexed [value << 8 | mask].
+    """
+    values, masks = _ALL_MASKS >> 8, _ALL_MASKS & 0xFF
+
+    packed = np.zeros(1 << 16, dtype=np.int64)
+    for bit in range(8):
+        # A picked bit lands after the picked bits below it
+        position = sum(masks >> below & 1 for below in range(bit)) if bit > 0 else 0
+        packed |= (values >> bit & masks >> bit & 1) << position
+
+    return packed.tolist()
+
+
+_RANKS: list[int] = _ranks()
+_PACKED_BITS: list[int] = _packed_bits()
+
+# Every (black count, white count) block is stored in turn, white masks packed into the squares black leaves empty
+_BLOCK_SIZES: dict[tuple[int, int], int] = {
+    (black_count, white_count): comb(16, black_count) * comb(16 - black_count, white_count)
+    for black_count in range(_MAX_PIECES + 1) for white_count in range(_MAX_PIECES + 1)
+}
+
+_BLOCK_OFFSETS: dict[tuple[int, int], int] = {
+    block: sum(list(_BLOCK_SIZES.values())[:i]) for i, block in enumerate(_BLOCK_SIZES)
+}
+
+_WHITE_COUNTS: dict[tuple[int, int], int] = {
+    (black_count, white_count): comb(16 - black_count, white_count) for black_count, white_count in _BLOCK_SIZES
+}
+
+ENTRY_COUNT: int = sum(_BLOCK_SIZES.values())
+
+
+def _index(black: int, white: int) -> int or None:
+    """
+    Returns where a sub board's value is stored, or None if it has more pieces than a game can reach.
+    """
+    block = (black.bit_count(), white.bit_count())
+    if block not in _BLOCK_OFFSETS:
+        return None
+
+    # White's bits packed into the squares that are not black
+    empty = ~black & 0xFFFF
+    packed_white = (
+        _PACKED_BITS[(white & 0xFF) << 8 | empty & 0xFF] |
+        _PACKED_BITS[(white >> 8) << 8 | empty >> 8] << (empty & 0xFF).bit_count()
+    )
+
+    return _BLOCK_OFFSETS[block] + _RANKS[black] * _WHITE_COUNTS[block] + _RANKS[packed_white]
+
+
+class SubBoardTable:
+    """
+    Memory mapped file of the black minus white value of every reachable sub board, worked out by Analyze for one
+    weight profile. The file starts with a header holding the weights and table version, so a table made for other
+    weights, or by an older evaluator, is seen as stale and not used.
+    """
+    # Bumped whenever Analyze changes how sub boards are valued, which makes older tables stale
+    VERSION: int = 1
+
+    _MAGIC: bytes = b"SHOBUEVT"
+    _HEADER: struct.Struct = struct.Struct("<8sI4dQ")
+
+    # Header is padded so the values that follow are aligned
+    _HEADER_SIZE: int = 64
+
+    # Sub boards worked out at a time while generating (Bounds the memory used by Analyze's arrays)
+    _CHUNK_SIZE: int = 16384
+
+    _WEIGHT_KEYS: tuple[str, ...] = ("Material", "Support", "Mobility", "Aggression")
+
+    def __init__(self, values: np.ndarray):
+        self._values: np.ndarray = values
+
+    def get(self, black: int, white: int) -> float or None:
+        """
+        Returns the stored value of a sub board, or None if it isn't in the table.
+        """
+        index = _index(black, white)
+
+        return float(self._values[index]) if index is not None else None
+
+    @classmethod
+    def _header(cls, concept_weights: dict[str, float]) -> bytes:
+        header = cls._HEADER.pack(cls._MAGIC, cls.VERSION, *(concept_weights[key] for key in cls._WEIGHT_KEYS),
+                                  ENTRY_COUNT)
+
+        return header.ljust(cls._HEADER_SIZE, b"\0")
+
+    @classmethod
+    def load(cls, path: str or Path, concept_weights: dict[str, float]):
+        """
+        Memory maps a table file, returning None if it is missing, or stale for the given weights.
+        """
+        path = Path(path)
+        if not path.exists() or path.stat().st_size != cls._HEADER_SIZE + 8 * ENTRY_COUNT:
+            return None
+
+        with open(path, "rb") as f:
+            if f.read(cls._HEADER_SIZE) != cls._header(concept_weights):
+                return None
+
+        return cls(np.memmap(path, dtype="<f8", mode="r", offset=cls._HEADER_SIZE, shape=(ENTRY_COUNT,)))
+
+    @classmethod
+    def generate(cls, analysis, path: str or Path) -> None:
+        """
+        Works out every reachable sub board with an Analyze, and writes them to a table file for its weights.
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        with open(path, "wb") as f:
+            f.write(cls._header(analysis.concept_weights))
+
+            for black_count, white_count in _BLOCK_OFFSETS:
+                packed_whites = _MASKS_BY_COUNT[white_count]
+                packed_whites = packed_whites[packed_whites < 1 << (16 - black_count)]
+
+                black_masks, white_masks = [], []
+                for black in _MASKS_BY_COUNT[black_count].tolist():
+                    # Spreading the packed white bits back out over the squares that are not black
+                    whites = np.zeros(len(packed_whites), dtype=np.int64)
+                    for i, square in enumerate(square for square in range(16) if not black >> square & 1):
+                        whites |= (packed_whites >> i & 1) << square
+
+                    black_masks.append(np.full(len(whites), black))
+                    white_masks.append(whites)
+
+                black_masks, white_masks = np.concatenate(black_masks), np.concatenate(white_masks)
+
+                for start in range(0, len(black_masks), cls._CHUNK_SIZE):
+                    end = start + cls._CHUNK_SIZE
+                    pieces = Board.masks_to_array(black_masks[start:end], white_masks[start:end]).reshape(-1, 16)
+
+                    f.write(analysis._sub_board_values(pieces).astype("<f8").tobytes())
+
+
+def generate_table(profile_path: str = MAIN_ENGINE_PROFILE, table_path: str = MAIN_EVALUATION_TABLE) -> None:
+    """
+    Generates the sub board table for the weights of a profile file (The main profile is created if it is missing).
+    """
+    # Imported here, since analyze imports this module
+    from .analyze import Analyze, load_profile
+
+    SubBoardTable.generate(Analyze(load_profile(profile_path), sub_board_table_path=None), table_path)
@@ -0,0 +1,157 @@
+import struct
+
+import numpy as np
+
+
+class TranspositionTable:
+    """
+    Fixed size table of search results keyed by Zobrist hash. Every bucket holds two entries: one that is only replaced
+    by searches of the same or greater depth, and one that is always replaced.
+    """
+    # Bound types of a stored score
+    EXACT: int = 0
+    LOWER: int = 1
+    UPPER: int = 2
+
+    # Approximate memory used by one stored entry (Entry tuple, hash, score and packed best move)
+    ENTRY_SIZE: int = 256
+
+    def __init__(self, size_mb: float = 64):
+        self._bucket_count: int = max(1, int(size_mb * 1024 * 1024) // (2 * self.ENTRY_SIZE))
+
+        # Entries are (hash, depth, score, bound, best move packed into an int), slot 2i is depth preferred and slot 2i + 1 always replace
+        self._slots: list[tuple[int, int, float, int, int or None] or None] = [None] * (2 * self._bucket_count)
+
+        # Statistics
+        self.hits: int = 0
+        self.misses: int = 0
+        self.collisions: int = 0
+        self.overwrites: int = 0
+
+    def _read(self, index: int) -> tuple[int, int, float, int, int or None] or None:
+        return self._slots[index]
+
+    def _write(self, index: int, entry: tuple[int, int, float, int, int or None]) -> None:
+        self._slots[index] = entry
+
+    def probe(self, key: int) -> tuple[int, int, float, int, int or None] or None:
+        """
+        Returns the entry stored for a hash, or None if there isn't one.
+        """
+        index = 2 * (key % self._bucket_count)
+
+        preferred, always = self._read(index), self._read(index + 1)
+        for entry in (preferred, always):
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry
+
+        # Counting misses where the bucket was holding other positions
+        if preferred is not None or always is not None:
+            self.collisions += 1
+
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, score: float, bound: int, best_move: int or None) -> None:
+        index = 2 * (key % self._bucket_count)
+        entry = (key, depth, score, bound, best_move)
+
+        preferred = self._read(index)
+        if preferred is None or preferred[0] == key or depth >= preferred[1]:
+            # Taking the depth preferred slot, and moving the entry that was there into the always replace one
+            self._write(index, entry)
+
+            if preferred is not None and preferred[0] != key:
+                self._replace(index + 1, preferred)
+
+        else:
+            self._replace(index + 1, entry)
+
+    def _replace(self, index: int, entry: tuple[int, int, float, int, int or None]) -> None:
+        previous = self._read(index)
+        if previous is not None and previous[0] != entry[0]:
+            self.overwrites += 1
+
+        self._write(index, entry)
+
+    def clear(self) -> None:
+        self._slots = [None] * (2 * self._bucket_count)
+
+        self.hits = self.misses = self.collisions = self.overwrites = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._slots)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "Hits": self.hits,
+            "Misses": self.misses,
+            "Collisions": self.collisions,
+            "Overwrites": self.overwrites,
+        }
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    Transposition table laid out as packed entries in a shared buffer, so worker processes can all read and write one
+    table. Entries are three 64 bit words: a check word, the score's bits and the data (Move, depth and bound). The check
+    word is the hash xor the other two, so an entry torn by two processes writing it at once reads as a miss.
+    Statistics are counted per process.
+    """
+    # Bytes used by one packed entry
+    ENTRY_SIZE: int = 24
+
+    def __init__(self, buffer, size_mb: float = 64):
+        self._bucket_count: int = max(1, int(size_mb * 1024 * 1024) // (2 * self.ENTRY_SIZE))
+
+        self._words = np.ndarray((2 * self._bucket_count, 3), dtype=np.uint64, buffer=buffer)
+        self._scores = self._words.view(np.float64)
+
+        # Statistics
+        self.hits: int = 0
+        self.misses: int = 0
+        self.collisions: int = 0
+        self.overwrites: int = 0
+
+    @classmethod
+    def buffer_size(cls, size_mb: float) -> int:
+        return max(1, int(size_mb * 1024 * 1024) // (2 * cls.ENTRY_SIZE)) * 2 * cls.ENTRY_SIZE
+
+    def _read(self, index: int) -> tuple[int, int, float, int, int or None] or None:
+        check, score_bits, data = self._words[index].tolist()
+
+        # Empty slots are all zeros (Stored depths are at least one, so data is never zero)
+        if data == 0:
+            return None
+
+        move_code = (data & 0xFFFFFF) - 1
+
+        return (
+            check ^ score_bits ^ data,
+            data >> 24 & 0xFFFF,
+            struct.unpack("<d", score_bits.to_bytes(8, "little"))[0],
+            data >> 40,
+            move_code if move_code >= 0 else None
+        )
+
+    def _write(self, index: int, entry: tuple[int, int, float, int, int or None]) -> None:
+        key, depth, score, bound, best_move = entry
+        data = (best_move + 1 if best_move is not None else 0) | depth << 24 | bound << 40
+
+        self._scores[index, 1] = score
+        score_bits = int(self._words[index, 1])
+
+        self._words[index, 2] = data
+        self._words[index, 0] = key ^ score_bits ^ data
+
+    def clear(self) -> None:
+        self._words.fill(0)
+
+        self.hits = self.misses = self.collisions = self.overwrites = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._words)
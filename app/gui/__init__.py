@@ -1,15 +1,29 @@
+import time
 import tkinter as tk
-from threading import Thread
 
 from shobu import *
 
 from .canvas import ShobuCanvas
+from .engine_service import EngineService, EngineUpdate
 from .info   import InfoFrame
 from .colors import Colors
 
 from ..engine import Engine
 
 class GUI(tk.Tk):
+    # Search run on every position (Iterative deepening up to the depth, so the evaluation is updated per depth)
+    ENGINE_DEPTH:   int = 2
+
+    # Searches run on one thread, since extra threads share the GIL with the Tk thread and slow both down
+    ENGINE_THREADS: int = 1
+
+    # Searching the replies to the position while the human thinks, so the engine can answer the one played right away
+    PONDER: bool = True
+
+    # Milliseconds between board updates, and seconds a finished game is shown before the board resets
+    FRAME_MS:    int   = 33
+    RESET_DELAY: float = 2.0
+
     def __init__(self):
         super().__init__()
 
@@ -41,37 +55,72 @@ class GUI(tk.Tk):
 
         self.engine_player: int = Board.WHITE
 
+        # Engine searches run off the Tk thread, the engine must not be used here directly once this is started
+        self.engine_service = EngineService(self, self.engine, self._on_engine_update)
+
+        # Position and engine player of the latest search, the last evaluation, and when the game was won
+        self._searched_position: bytes or None = None
+        self._searched_player: int or None = None
+        self._top_eval: float = 0.0
+        self._game_over_time: float or None = None
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
     def mainloop(self, n = 0):
-        def update_board(t, top_eval, past_serial):
-            new_serial = past_serial
+        # The evaluation comes from the first search, which starts on the first board update
+        self.data_frame.update_info(self.board, self._top_eval, "Your Move")
+        self._update_board()
+
+        super().mainloop(n)
 
-            if self.board.has_winner():
-                if t > 2000:
-                    self.board.reset()
-                    t = 0
+    def _update_board(self):
+        # Applying the human's move, if one has been selected
+        self.canvas.update_board(self.board)
 
-            elif past_serial != self.board.serialized_string or (self.board.current_player_turn == self.engine_player and t > 60):
-                if t > 100:
-                    self.data_frame.update_info(self.board, top_eval, "Thinking. . .")
-                    t = 0
+        if self.board.has_winner():
+            if self._game_over_time is None:
+                self._game_over_time = time.perf_counter()
+                self.engine_service.cancel()
 
-                else:
-                    top_move, top_eval = self.engine.get_best_move(self.board, 2, threads=24)
+            elif time.perf_counter() - self._game_over_time > self.RESET_DELAY:
+                self._game_over_time = None
+                self.board.reset()
 
-                    if self.board.current_player_turn == self.engine_player:
-                        self.board.make_move(top_move)
+        # Searching again whenever the position or the engine's side changes, cancelling the last search
+        elif self.board.to_bytes() != self._searched_position or self.engine_player != self._searched_player:
+            self._searched_position = self.board.to_bytes()
+            self._searched_player = self.engine_player
 
-                    new_serial = self.board.serialized_string
-                    self.data_frame.update_info(self.board, top_eval, "Your Move")
+            if self.PONDER and self.engine_player != Board.NONE and self.board.current_player_turn != self.engine_player:
+                self.engine_service.ponder(self.board, max_depth=self.ENGINE_DEPTH, threads=self.ENGINE_THREADS)
             else:
-                t += 33
+                self.engine_service.search(self.board, max_depth=self.ENGINE_DEPTH, threads=self.ENGINE_THREADS)
 
-            self.canvas.update_board(self.board)
-            self.canvas.render(self.board)
+            self.data_frame.update_info(self.board, self._top_eval, self._status())
 
-            self.after(33, lambda: update_board(t, top_eval, new_serial))
+        self.canvas.render(self.board)
 
-        self.data_frame.update_info(self.board, 0.0, "Your Move")
-        Thread(target=update_board, args=(0, self.engine.analyze(self.board), self.board.serialized_string)).start()
+        self.after(self.FRAME_MS, self._update_board)
 
-        super().mainloop(n)
+    def _on_engine_update(self, update: EngineUpdate):
+        # The board may have changed since the search started
+        if update.position != self.board.to_bytes():
+            return
+
+        if update.best_score is not None:
+            self._top_eval = update.best_score
+
+        if update.finished and self.board.current_player_turn == self.engine_player and update.best_move is not None:
+            self.board.make_move(update.best_move)
+
+        self.data_frame.update_info(self.board, self._top_eval, self._status(update))
+
+    def _status(self, update: EngineUpdate or None = None) -> str:
+        if self.board.current_player_turn != self.engine_player:
+            return "Your Move"
+
+        return f"Thinking. . . (Depth {update.depth})" if update is not None and update.depth > 0 else "Thinking. . ."
+
+    def _on_close(self):
+        self.engine_service.close()
+        self.destroy()
@@ -78,7 +78,10 @@ class ShobuCanvas(tk.Canvas):
             half_square: int = int(self.board_size / 16)
             full_square: int = int(self.board_size / 8)
 
-            for sub_board in board.boards:
+            # Built from the bitboards on every access, so read once per render
+            boards = board.boards
+
+            for sub_board in boards:
                 # Getting the offset for things like left/right, and white/black sides
                 sub_board_offset = [0, 0]
                 if sub_board.count("black"):
@@ -92,10 +95,10 @@ class ShobuCanvas(tk.Canvas):
                     for y in range(0, 4):
                         color = None
 
-                        if board.boards[sub_board][3 - x][3 - y] == shobu.Board.BLACK:
+                        if boards[sub_board][3 - x][3 - y] == shobu.Board.BLACK:
                             color = self.colors.dark_piece
 
-                        elif board.boards[sub_board][3 - x][3 - y] == shobu.Board.WHITE:
+                        elif boards[sub_board][3 - x][3 - y] == shobu.Board.WHITE:
                             color = self.colors.light_piece
 
                         # Drawing piece onto board if a color is found
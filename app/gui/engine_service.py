@@ -0,0 +1,236 @@
+import queue
+import tkinter as tk
+from threading import Event, Thread
+from typing import Callable
+
+from shobu import Board, MovePair
+
+from ..engine import Engine, SearchAborted, SearchStats
+
+
+class EngineUpdate:
+    """
+    Best move and score of a search so far, or its result once finished is True. Position is the searched board as bytes
+    (See Board.to_bytes), so an update can be checked against the board it is applied to.
+    """
+    __slots__ = ("search_id", "position", "depth", "best_move", "best_score", "nodes", "finished")
+
+    def __init__(self, search_id: int, position: bytes, depth: int, best_move: MovePair or None,
+                 best_score: float or None, nodes: int, finished: bool):
+        self.search_id: int = search_id
+        self.position: bytes = position
+        self.depth: int = depth
+        self.best_move: MovePair or None = best_move
+        self.best_score: float or None = best_score
+        self.nodes: int = nodes
+        self.finished: bool = finished
+
+
+class EngineService:
+    """
+    Runs engine searches on a background thread, so the Tk event loop keeps running while the engine thinks. Updates
+    are put on a queue by the search thread, and handed to a callback on the Tk thread by polling the queue with after.
+
+    Starting a search cancels the one that is running, and only updates of the latest search are handed on. The engine
+    is only used by the search thread once the service is started, since it is not safe to share between threads.
+
+    Pondering searches a position, then searches every reply to it with the same settings while the other player
+    thinks, starting with the replies the engine expects. A search of a reply that was already pondered hands on the
+    pondered result straight away. Replies that were not reached still find their subtrees in the transposition table.
+    """
+    # Milliseconds between polls of the update queue (A frame at 60 fps)
+    POLL_INTERVAL_MS: int = 16
+
+    # Seconds between progress updates while a depth is being searched
+    PROGRESS_INTERVAL: float = 0.1
+
+    def __init__(self, root: tk.Misc, engine: Engine, on_update: Callable[[EngineUpdate], None]):
+        self._root: tk.Misc = root
+        self._engine: Engine = engine
+        self._on_update: Callable[[EngineUpdate], None] = on_update
+
+        # Searches waiting for the search thread (None stops it), and updates waiting for the Tk thread
+        self._requests: queue.Queue = queue.Queue()
+        self._updates: queue.Queue = queue.Queue()
+
+        # Latest search, and the event that cancels it
+        self._search_id: int = 0
+        self._cancel_event: Event = Event()
+        self._searching: bool = False
+
+        # Results of pondered replies, by position and search settings
+        self._ponder_results: dict[tuple[bytes, tuple], EngineUpdate] = {}
+
+        self._thread: Thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        self._poll_id: str or None = self._root.after(self.POLL_INTERVAL_MS, self._poll)
+
+    @property
+    def searching(self) -> bool:
+        """
+        Whether the latest search has yet to hand on its result.
+        """
+        return self._searching
+
+    @property
+    def search_id(self) -> int:
+        return self._search_id
+
+    @property
+    def pondered_replies(self) -> int:
+        return len(self._ponder_results)
+
+    def search(self, board: Board, depth: int or None = None, threads: int = 1, time_limit: float or None = None,
+               max_depth: int or None = None) -> int:
+        """
+        Cancels the running search and starts one of a copy of the board, returning its id. Takes the same search
+        settings as Engine.get_best_move (Progress is only shown per depth with a time limit or max depth).
+        """
+        search_id = self._start()
+        settings = (depth, threads, time_limit, max_depth)
+
+        pondered = self._ponder_results.get((board.to_bytes(), settings))
+
+        if pondered is not None:
+            self._updates.put(EngineUpdate(search_id, pondered.position, pondered.depth, pondered.best_move,
+                                           pondered.best_score, pondered.nodes, True))
+        else:
+            self._requests.put((search_id, self._cancel_event, board.copy(), settings, None))
+
+        return search_id
+
+    def ponder(self, board: Board, depth: int or None = None, threads: int = 1, time_limit: float or None = None,
+               max_depth: int or None = None) -> int:
+        """
+        Like search, handing on the board's result the same way, then goes on to search every reply with the same
+        settings until cancelled. Results of the last ponder are dropped.
+        """
+        search_id = self._start()
+
+        self._ponder_results = {}
+        self._requests.put((search_id, self._cancel_event, board.copy(), (depth, threads, time_limit, max_depth),
+                            self._ponder_results))
+
+        return search_id
+
+    def _start(self) -> int:
+        self.cancel()
+
+        self._search_id += 1
+        self._cancel_event = Event()
+        self._searching = True
+
+        return self._search_id
+
+    def cancel(self) -> None:
+        """
+        Stops the running search. Nothing more is handed on from it.
+        """
+        self._cancel_event.set()
+        self._searching = False
+
+    def close(self) -> None:
+        """
+        Stops the running search and the search thread, and waits for it to finish.
+        """
+        self.cancel()
+        self._requests.put(None)
+
+        if self._poll_id is not None:
+            self._root.after_cancel(self._poll_id)
+            self._poll_id = None
+
+        self._thread.join()
+        self._engine.close()
+
+    def _poll(self) -> None:
+        while True:
+            try:
+                update = self._updates.get_nowait()
+            except queue.Empty:
+                break
+
+            # Updates of a search that was cancelled or replaced are dropped
+            if update.search_id != self._search_id or not self._searching:
+                continue
+
+            if update.finished:
+                self._searching = False
+
+            self._on_update(update)
+
+        self._poll_id = self._root.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def _run(self) -> None:
+        while True:
+            request = self._requests.get()
+
+            # Skipping to the newest request, since every one before it has been cancelled
+            while request is not None and not self._requests.empty():
+                request = self._requests.get()
+
+            if request is None:
+                return
+
+            search_id, cancel_event, board, settings, ponder_results = request
+
+            if cancel_event.is_set():
+                continue
+
+            update = self._search(search_id, cancel_event, board, settings, True)
+
+            if update is not None:
+                self._updates.put(update)
+
+                if ponder_results is not None:
+                    self._ponder(search_id, cancel_event, board, settings, ponder_results)
+
+    def _ponder(self, search_id: int, cancel_event: Event, board: Board, settings: tuple,
+                ponder_results: dict[tuple[bytes, tuple], EngineUpdate]) -> None:
+        # The search of the board left the expected reply in the transposition table, so the orderer puts it first
+        entry = self._engine.transposition_table.probe(board.hash)
+        table_move = entry[4] if entry is not None else None
+
+        for move in self._engine.move_orderer.order(board, board.get_legal_moves_encoded(), 0, table_move):
+            board.make_move_encoded(move)
+            update = self._search(search_id, cancel_event, board, settings, False) if not board.is_terminal else None
+            board.undo_move_encoded()
+
+            if cancel_event.is_set():
+                return
+
+            if update is not None:
+                ponder_results[(update.position, settings)] = update
+
+    def _search(self, search_id: int, cancel_event: Event, board: Board, settings: tuple,
+                progress: bool) -> EngineUpdate or None:
+        """
+        Searches a board, returning its result, or None if the search was cancelled.
+        """
+        depth, threads, time_limit, max_depth = settings
+        position = board.to_bytes()
+
+        def post_progress(stats: SearchStats):
+            self._updates.put(EngineUpdate(search_id, position, stats.depth, stats.best_move, stats.best_score,
+                                           stats.total_nodes, False))
+
+        stats = SearchStats(post_progress if progress else None, self.PROGRESS_INTERVAL)
+
+        self._engine.set_stop_check(cancel_event.is_set)
+
+        try:
+            best_move, best_score = self._engine.get_best_move(board, depth, threads, time_limit=time_limit,
+                                                               max_depth=max_depth, stats=stats)
+
+        except SearchAborted:
+            return None
+
+        finally:
+            self._engine.set_stop_check(None)
+
+        # Iterative deepening returns the deepest finished depth when stopped, which is not wanted once cancelled
+        if cancel_event.is_set():
+            return None
+
+        return EngineUpdate(search_id, position, stats.depth, best_move, best_score, stats.total_nodes, True)
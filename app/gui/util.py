@@ -7,6 +7,9 @@ COLOR_FILE = "color.json"
 ENGINE_PROFILES_DIRECTORY_PATH = "user_data/profiles/"
 MAIN_ENGINE_PROFILE = "user_data/profiles/main.json"
 
+# Precomputed sub board values for the main profile (See app.engine.sub_board_table)
+MAIN_EVALUATION_TABLE = "user_data/profiles/main.eval"
+
 SAMPLE_PROFILE = {
     "Material": 1.0,
     "Support": 1.0,
@@ -0,0 +1,84 @@
+"""
+Memory allocated per node by move generation: blocks and bytes held by the legal move list of each position, and the
+peak memory allocated while each move is made and undone, measured with tracemalloc. Measured for moves as MovePairs
+and as packed ints.
+
+Run with: python -m benchmarks.allocations
+"""
+import gc
+import time
+import tracemalloc
+
+from .positions import random_positions
+
+
+def _legal_moves(board, encoded: bool) -> list:
+    return board.get_legal_moves_encoded() if encoded else board.get_legal_moves()
+
+
+def retained_by_moves(positions, encoded: bool = False) -> tuple[int, int, int]:
+    """
+    Returns (moves, blocks, bytes) held by the legal move lists of the positions.
+    """
+    gc.collect()
+    tracemalloc.start()
+
+    before = tracemalloc.take_snapshot()
+    move_lists = [_legal_moves(board, encoded) for board in positions]
+    after = tracemalloc.take_snapshot()
+
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+
+    return sum(len(moves) for moves in move_lists), blocks, size
+
+
+def peak_making_moves(positions, encoded: bool = False) -> tuple[int, int]:
+    """
+    Returns (moves, bytes) of the summed peak memory allocated while each legal move of the positions is made and
+    undone, which counts memory that is freed again by the end of the move.
+    """
+    move_lists = [_legal_moves(board, encoded) for board in positions]
+
+    gc.collect()
+    tracemalloc.start()
+
+    peak = 0
+    for board, moves in zip(positions, move_lists):
+        make_move = board.make_move_encoded if encoded else board.make_move
+        for move in moves:
+            tracemalloc.reset_peak()
+            start_size = tracemalloc.get_traced_memory()[0]
+
+            make_move(move)
+            board.undo_move()
+
+            peak += tracemalloc.get_traced_memory()[1] - start_size
+
+    tracemalloc.stop()
+
+    return sum(len(moves) for moves in move_lists), peak
+
+
+if __name__ == '__main__':
+    positions = random_positions(50, min_plies=4, max_plies=30, seed=6)
+
+    for encoded in (False, True):
+        print("Packed ints" if encoded else "MovePairs")
+
+        move_count, blocks, size = retained_by_moves(positions, encoded)
+        print(f"  {len(positions)} positions, {move_count} legal moves")
+        print(f"  Move lists hold    {blocks / len(positions):>9.1f} blocks  {size / len(positions):>10.1f} bytes per node  "
+              f"({size / move_count:.1f} bytes per move)")
+
+        _move_count, peak_bytes = peak_making_moves(positions, encoded)
+        print(f"  Make/undo peak     {peak_bytes / move_count:>9.1f} bytes per move")
+
+        start_time = time.perf_counter()
+        for board in positions:
+            _legal_moves(board, encoded)
+
+        print(f"  Generation         {(time.perf_counter() - start_time) / len(positions) * 1e6:>9.1f} us per node")
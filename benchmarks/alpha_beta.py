@@ -0,0 +1,113 @@
+"""
+Checks the engine's alpha-beta search against a brute force minimax over a corpus of positions at depths 1 to 3. Scores
+have to be identical, and the nodes each search visited are reported to show how much alpha-beta prunes. Exits with a
+failure status if any score differs.
+
+Run with: python -m benchmarks.alpha_beta [max depth]
+"""
+import sys
+import time
+
+from shobu import Board
+
+from app.engine import Engine
+from app.engine.analyze import Analyze
+from app.engine.ordering import HeuristicMoveOrderer, MoveOrderer
+
+from .positions import random_positions, sparse_positions
+
+
+WEIGHTS: dict[str, float] = {
+    "Material":   1.0,
+    "Support":    1.0,
+    "Mobility":   1.0,
+    "Aggression": 1.0
+}
+
+
+class BruteForce:
+    """
+    Plain minimax that searches every move, with no pruning, tables or ordering.
+    """
+    def __init__(self, concept_weights: dict[str, float]):
+        self._analysis = Analyze(concept_weights)
+        self.nodes: int = 0
+
+    def minimax(self, board: Board, depth: int) -> float:
+        self.nodes += 1
+
+        if board.is_terminal or depth == 0:
+            return self._analysis.analyze(board)
+
+        is_maximizing = board.current_player_turn == Board.BLACK
+
+        # With no legal moves the player to move has lost
+        best_eval = float('-inf') if is_maximizing else float('inf')
+
+        for move in board.get_legal_moves():
+            board.make_move(move)
+            child_eval = self.minimax(board, depth - 1)
+            board.undo_move()
+
+            best_eval = max(best_eval, child_eval) if is_maximizing else min(best_eval, child_eval)
+
+        return best_eval
+
+
+def alpha_beta(board: Board, depth: int, move_orderer: MoveOrderer) -> tuple[float, int]:
+    """
+    Returns (score, nodes searched) of a fixed depth search by a fresh engine.
+    """
+    engine = Engine(concept_weights=WEIGHTS, move_orderer=move_orderer)
+    _best_move, best_score = engine.get_best_move(board, depth)
+
+    return best_score, engine.nodes_searched
+
+
+def corpus() -> list[tuple[int, Board]]:
+    """
+    Returns (deepest depth to check, position) pairs. Full positions have too many moves to brute force past depth 2.
+    """
+    return (
+        [(2, board) for board in random_positions(2, min_plies=6, max_plies=12, seed=11)] +
+        [(3, board) for board in sparse_positions(4, pieces=1, seed=7)] +
+        [(3, board) for board in sparse_positions(2, pieces=2, seed=7)]
+    )
+
+
+if __name__ == '__main__':
+    max_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    orderers = {"Table move only": MoveOrderer, "Heuristic": HeuristicMoveOrderer}
+
+    totals = {"Minimax": 0, **{name: 0 for name in orderers}}
+    mismatches = 0
+
+    start_time = time.perf_counter()
+
+    for index, (deepest, board) in enumerate(corpus()):
+        for depth in range(1, min(deepest, max_depth) + 1):
+            brute_force = BruteForce(WEIGHTS)
+            expected = brute_force.minimax(board.copy(), depth)
+            totals["Minimax"] += brute_force.nodes
+
+            results = [f"minimax {brute_force.nodes:>8}"]
+            for name, orderer in orderers.items():
+                score, nodes = alpha_beta(board, depth, orderer())
+                totals[name] += nodes
+
+                if score != expected:
+                    mismatches += 1
+                    print(f"MISMATCH position {index} depth {depth} ({name}): {score} != {expected}")
+
+                results.append(f"{name.lower()} {nodes:>8}")
+
+            print(f"Position {index:>2} depth {depth}  score {expected:>10.4f}  nodes: {'  '.join(results)}")
+
+    print(f"\nTotal nodes  " + "  ".join(f"{name}: {nodes}" for name, nodes in totals.items()))
+    print(f"Alpha-beta searched {totals['Heuristic'] / totals['Minimax']:.1%} of minimax's nodes with heuristic "
+          f"ordering ({time.perf_counter() - start_time:.1f}s)")
+
+    if mismatches > 0:
+        print(f"{mismatches} scores differ from minimax")
+        sys.exit(1)
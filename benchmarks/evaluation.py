@@ -0,0 +1,211 @@
+"""
+Time per position of Analyze.analyze against the square by square evaluator it replaced, with a check that both give
+the same scores (To within floating point tolerance, since the terms are summed in a different order). Also checks the
+term tables give exactly what the term equations do, and times
+evaluating every child of a position one at a time against one Analyze.analyze_many batch, and against
+Analyze.analyze_incremental.
+
+Run with: python -m benchmarks.evaluation [positions]
+"""
+import math
+import sys
+from typing import Callable
+
+import numpy as np
+
+from shobu import Board
+
+from app.engine.analyze import Analyze
+
+from .positions import random_positions, sparse_positions, time_function
+
+
+WEIGHTS: dict[str, float] = {
+    "Material":   1.1,
+    "Support":    0.9,
+    "Mobility":   1.3,
+    "Aggression": 0.7
+}
+
+TOLERANCE: float = 1e-9
+
+
+class ScanningAnalyze(Analyze):
+    """
+    The evaluator as it was before it was vectorized: every square of every sub board is scanned in Python.
+    """
+    def _scalar_material(self, n) -> float:
+        return (math.log(6 * (n - 0.85))) * self._concept_weights["Material"]
+
+    def _scalar_support(self, n) -> float:
+        return (0.75 * (n / 1.5) ** .5) * self._concept_weights["Support"]
+
+    def _scalar_mobility(self, n) -> float:
+        if 0 <= n <= 2:
+            return (2 * ((n / 2) ** 2) * (3 - 2 * (n / 2))) * self._concept_weights["Mobility"]
+        else:
+            return (0.5 * math.sqrt(n - 1) + 1.5) * self._concept_weights["Mobility"]
+
+    def _scalar_aggression(self, n) -> float:
+        return (0.35 * (n ** 0.5)) * self._concept_weights["Aggression"]
+
+    def analyze(self, board: Board) -> float:
+        total_eval: float = 0
+
+        for sub_board in board.boards.values():
+            piece_ratio = [int((sub_board == Board.BLACK).sum()), int((sub_board == Board.WHITE).sum())]
+
+            if piece_ratio[0] == 0 or piece_ratio[1] == 0:
+                return self.WHITE_WIN if piece_ratio[0] == 0 else self.BLACK_WIN
+
+            support_connections = [0, 0]
+            aggressive_connections = [0, 0]
+
+            black_mobility = {direction: 0.0 for direction in self._DIRECTIONS}
+            white_mobility = {direction: 0.0 for direction in self._DIRECTIONS}
+
+            for x in range(4):
+                for y in range(4):
+                    piece = sub_board[x][y]
+                    if piece == Board.NONE:
+                        continue
+
+                    for dx_mag, dy_mag, dx, dy, mag in self._DIRECTION_MAG_OFFSETS:
+                        x2, y2 = x + dx_mag, y + dy_mag
+
+                        if not (x2 in range(0, 4) and y2 in range(0, 4)):
+                            continue
+
+                        new_piece = sub_board[x2][y2]
+
+                        if new_piece == Board.NONE:
+                            if piece == Board.BLACK:
+                                black_mobility[(dx, dy)] += 0.5 if mag == 1 else 1
+                            else:
+                                white_mobility[(dx, dy)] += 0.5 if mag == 1 else 1
+
+                        if new_piece == piece:
+                            support_connections[0 if piece == Board.BLACK else 1] += 1 if mag == 1 else 0.25
+
+                        if new_piece == - piece:
+                            aggressive_connections[0 if piece == Board.BLACK else 1] += 1 if mag == 1 else 0.35
+
+            total_eval += self._scalar_material(piece_ratio[0]) - self._scalar_material(piece_ratio[1])
+
+            for direction in self._DIRECTIONS:
+                total_eval += self._scalar_mobility(black_mobility[direction]) - \
+                              self._scalar_mobility(white_mobility[direction])
+
+            total_eval += self._scalar_aggression(aggressive_connections[0]) - \
+                          self._scalar_aggression(aggressive_connections[1])
+
+            total_eval += self._scalar_support(support_connections[0]) - \
+                          self._scalar_support(support_connections[1])
+
+        return total_eval
+
+
+class ClosedFormAnalyze(Analyze):
+    """
+    Evaluates the term equations directly instead of looking them up in tables.
+    """
+    def _term_values(self, piece_counts: np.ndarray, mobility: np.ndarray, support: np.ndarray,
+                     aggression: np.ndarray) -> np.ndarray:
+        return (
+            self._material_equation(np.maximum(piece_counts, 1)) +
+            self._mobility_equation(self._combine(mobility[..., 0], mobility[..., 1], self._MOBILITY_STEPS)).sum(axis=-1) +
+            self._aggression_equation(self._combine(aggression[..., 0], aggression[..., 1], self._AGGRESSION_STEPS)) +
+            self._support_equation(self._combine(support[..., 0], support[..., 1], self._SUPPORT_STEPS))
+        )
+
+
+def max_difference(reference: Analyze, analysis: Analyze, positions: list[Board]) -> float:
+    """
+    Returns the largest difference between the two evaluators' scores over the positions (Wins have to match exactly).
+    """
+    difference = 0.0
+
+    for board in positions:
+        expected, score = reference.analyze(board), analysis.analyze(board)
+
+        if math.isinf(expected) or math.isinf(score):
+            difference = max(difference, 0.0 if expected == score else math.inf)
+        else:
+            difference = max(difference, abs(expected - score))
+
+    return difference
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    positions = random_positions(count, min_plies=0, max_plies=40, seed=2) + sparse_positions(count // 4, seed=2)
+
+    reference, analysis = ScanningAnalyze(WEIGHTS), Analyze(WEIGHTS)
+
+    difference = max_difference(reference, analysis, positions)
+    print(f"{len(positions)} positions, largest score difference {difference:.3g}")
+
+    def evaluate_all(evaluator: Analyze):
+        return lambda: [evaluator.analyze(board) for board in positions]
+
+    reference_time = time_function(evaluate_all(reference), 3) / len(positions)
+    analysis_time = time_function(evaluate_all(analysis), 3) / len(positions)
+
+    # Tables have to give exactly what the equations do
+    closed_form = ClosedFormAnalyze(WEIGHTS)
+    table_mismatches = sum(closed_form.analyze(board) != analysis.analyze(board) for board in positions)
+    closed_form_time = time_function(evaluate_all(closed_form), 3) / len(positions)
+
+    print(f"Scanning     {reference_time * 1e6:>9.1f} us/position")
+    print(f"Closed form  {closed_form_time * 1e6:>9.1f} us/position")
+    print(f"Tables       {analysis_time * 1e6:>9.1f} us/position  ({reference_time / analysis_time:.1f}x faster than "
+          f"scanning, {closed_form_time / analysis_time:.2f}x faster than closed form)")
+    print(f"Positions where tables and closed form differ: {table_mismatches}")
+
+    # Every child of a few positions, evaluated one at a time and as one batch per position
+    parents = positions[:10]
+    child_count = sum(len(board.get_legal_moves()) for board in parents)
+
+    single_time = time_function(lambda: [analysis.analyze(board.get_mock(move))
+                                         for board in parents for move in board.get_legal_moves()], 1) / child_count
+    batch_time = time_function(lambda: [analysis.analyze_many(board.get_children_array()) for board in parents], 3)
+
+    print(f"\n{child_count} children of {len(parents)} positions (Including making the moves)")
+    print(f"One at a time  {single_time * 1e6:>9.1f} us/position")
+    print(f"Batched        {batch_time / child_count * 1e6:>9.1f} us/position  "
+          f"({single_time * child_count / batch_time:.1f}x faster)")
+
+    # Every child of the same positions again, each evaluated from scratch and incrementally from its parent
+    def evaluate_children(evaluate) -> Callable[[], None]:
+        def evaluate_all_children():
+            for board in parents:
+                analysis.analyze_incremental(board)
+
+                for move in board.get_legal_moves():
+                    board.make_move(move)
+                    evaluate(board)
+                    board.undo_move()
+
+        return evaluate_all_children
+
+    incremental_mismatches = sum(
+        analysis.analyze_incremental(child) != analysis.analyze(child)
+        for board in parents for child in (board.get_mock(move) for move in board.get_legal_moves())
+    )
+
+    scratch_time = time_function(evaluate_children(analysis.analyze), 3) / child_count
+
+    # A fresh evaluator has to work out every sub board once, after that most are remembered
+    analysis = Analyze(WEIGHTS)
+    cold_time = time_function(evaluate_children(analysis.analyze_incremental), 1) / child_count
+    warm_time = time_function(evaluate_children(analysis.analyze_incremental), 3) / child_count
+
+    print(f"\nSame children, each made and undone on its parent")
+    print(f"From scratch                {scratch_time * 1e6:>9.1f} us/position")
+    print(f"Incremental (Cold cache)    {cold_time * 1e6:>9.1f} us/position  ({scratch_time / cold_time:.1f}x faster)")
+    print(f"Incremental                 {warm_time * 1e6:>9.1f} us/position  ({scratch_time / warm_time:.1f}x faster)")
+    print(f"Children where incremental and from scratch differ: {incremental_mismatches}")
+
+    if difference > TOLERANCE or table_mismatches > 0 or incremental_mismatches > 0:
+        print(f"Scores differ by more than {TOLERANCE}, or tables or incremental evaluation differ from analyze")
+        sys.exit(1)
@@ -0,0 +1,125 @@
+"""
+Legal move generation throughput over the start position and a set of seeded mid-game positions, for moves as MovePairs
+and as packed ints. The bitboard generator is also checked against, and timed next to, a generator that looks every
+piece's moves up in the move geometry table one at a time.
+
+Run with: python -m benchmarks.move_generation
+"""
+from shobu import Board
+from shobu.board import _GEOMETRY
+
+from .positions import random_positions, time_function
+
+
+def geometry_legal_moves(board: Board) -> list[int]:
+    """
+    Returns the packed legal moves of a board, found one piece and vector at a time from the geometry table.
+    """
+    black, white = board.piece_masks
+    own, opponent, home_boards = (black, white, (0, 1)) if board.current_player_turn == Board.BLACK else \
+        (white, black, (2, 3))
+
+    def pieces(mask: int) -> list[int]:
+        return [square for square in range(16) if mask >> square & 1]
+
+    def is_set(mask: int, square: int or None) -> bool:
+        return square is not None and bool(mask >> square & 1)
+
+    moves = []
+    for passive_board in home_boards:
+        occupied = own[passive_board] | opponent[passive_board]
+
+        for vector in range(len(_GEOMETRY[0])):
+            # Passive moves need every square they pass through or land on to be empty
+            passive_moves = [
+                (start, geometry[0]) for start in pieces(own[passive_board])
+                if (geometry := _GEOMETRY[start][vector]) is not None
+                and not is_set(occupied, geometry[0]) and not is_set(occupied, geometry[1])
+            ]
+
+            # Aggressive moves can't go through their own pieces, and push at most one piece onto an empty square or off
+            # the board
+            aggressive_moves = []
+            for board_index in Board._ADJACENT_BOARDS[passive_board]:
+                board_own, board_opponent = own[board_index], opponent[board_index]
+
+                for start in pieces(board_own):
+                    geometry = _GEOMETRY[start][vector]
+                    if geometry is None:
+                        continue
+
+                    end, middle, landing = geometry
+                    if is_set(board_own, end) or is_set(board_own, middle):
+                        continue
+
+                    pushed = is_set(board_opponent, end) + is_set(board_opponent, middle)
+                    if pushed > 1 or (pushed and is_set(board_own | board_opponent, landing)):
+                        continue
+
+                    aggressive_moves.append(board_index << 8 | start << 4 | end)
+
+            moves.extend(
+                passive_board << 18 | start << 14 | end << 10 | aggressive
+                for start, end in passive_moves for aggressive in aggressive_moves
+            )
+
+    return moves
+
+
+def benchmark_legal_moves(positions: list[Board], trials: int = 20, encoded: bool = False) -> tuple[float, float]:
+    """
+    Returns (calls per second, moves generated per second) for get_legal_moves, or get_legal_moves_encoded, over the
+    given positions.
+    """
+    move_count = sum(len(board.get_legal_moves_encoded()) for board in positions)
+
+    def generate_all():
+        for board in positions:
+            board.get_legal_moves_encoded() if encoded else board.get_legal_moves()
+
+    seconds = time_function(generate_all, trials)
+
+    return len(positions) / seconds, move_count / seconds
+
+
+def benchmark_make_undo(positions: list[Board], trials: int = 5, encoded: bool = False) -> float:
+    """
+    Returns make_move + undo_move pairs per second over every legal move of the given positions (Or the encoded
+    versions, with packed moves).
+    """
+    move_lists = [
+        (board, board.get_legal_moves_encoded() if encoded else board.get_legal_moves()) for board in positions
+    ]
+    move_count = sum(len(moves) for _, moves in move_lists)
+
+    def make_undo_all():
+        for board, moves in move_lists:
+            make_move = board.make_move_encoded if encoded else board.make_move
+            for move in moves:
+                make_move(move)
+                board.undo_move()
+
+    return move_count / time_function(make_undo_all, trials)
+
+
+if __name__ == '__main__':
+    start = [Board()]
+    mid_game = random_positions(32, seed=1)
+
+    for name, positions in (("Start position", start), ("Mid-game (32)", mid_game)):
+        for encoded in (False, True):
+            calls, moves = benchmark_legal_moves(positions, encoded=encoded)
+            label = "get_legal_moves_encoded" if encoded else "get_legal_moves"
+            print(f"{name:<16} {label + ':':<24} {calls:>10.1f} calls/s {moves:>12.1f} moves/s")
+
+    for encoded in (False, True):
+        label = "make/undo encoded" if encoded else "make/undo"
+        print(f"{'Mid-game (32)':<16} {label + ':':<24} {benchmark_make_undo(mid_game, encoded=encoded):>10.1f} pairs/s")
+
+    mismatches = sum(
+        sorted(geometry_legal_moves(board)) != sorted(board.get_legal_moves_encoded()) for board in mid_game
+    )
+    geometry_seconds = time_function(lambda: [geometry_legal_moves(board) for board in mid_game], 5)
+
+    print(f"{'Mid-game (32)':<16} {'per piece from table:':<24} {len(mid_game) / geometry_seconds:>10.1f} calls/s "
+          f"({mismatches} positions where it differs from the bitboard generator)")
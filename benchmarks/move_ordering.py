@@ -0,0 +1,44 @@
+"""
+Nodes searched at a fixed depth with only transposition table ordering, against the full heuristic ordering.
+
+Run with: python -m benchmarks.move_ordering [depth]
+"""
+import sys
+import time
+
+from app.engine import Engine
+from app.engine.ordering import HeuristicMoveOrderer, MoveOrderer
+
+from .alpha_beta import WEIGHTS
+from .positions import random_positions
+
+
+def count_nodes(move_orderer: MoveOrderer, positions, depth: int) -> tuple[int, float]:
+    """
+    Returns (total nodes, total seconds) of a fixed depth search of every position, each with a fresh engine.
+    """
+    nodes, seconds = 0, 0.0
+
+    for board in positions:
+        engine = Engine(concept_weights=WEIGHTS, move_orderer=move_orderer)
+
+        start_time = time.perf_counter()
+        engine.get_best_move(board, depth)
+
+        seconds += time.perf_counter() - start_time
+        nodes += engine.nodes_searched
+
+        move_orderer.clear()
+
+    return nodes, seconds
+
+
+if __name__ == '__main__':
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    positions = random_positions(4, min_plies=8, max_plies=16, seed=5)
+
+    base_nodes, base_seconds = count_nodes(MoveOrderer(), positions, depth)
+    print(f"Table move only  {base_nodes:>10} nodes  {base_seconds:>8.2f}s")
+
+    nodes, seconds = count_nodes(HeuristicMoveOrderer(), positions, depth)
+    print(f"Heuristic        {nodes:>10} nodes  {seconds:>8.2f}s  ({base_nodes / nodes:.2f}x fewer nodes)")
@@ -0,0 +1,64 @@
+"""
+Parallel search over 1/2/4/8 worker processes in both parallel modes: root splitting, checked against the serial
+search, and Lazy SMP, with time to depth and nodes per second.
+
+Run with: python -m benchmarks.parallel_search [depth]
+"""
+import sys
+import time
+
+from app.engine import Engine
+
+from .alpha_beta import WEIGHTS
+from .positions import random_positions
+
+
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def timed_search(engine: Engine, board, depth: int, processes: int) -> tuple[float, object, float]:
+    start_time = time.perf_counter()
+    best_move, best_score = engine.get_best_move(board, depth, processes=processes)
+
+    return time.perf_counter() - start_time, best_move, best_score
+
+
+def started_engine(parallel_mode: str, workers: int) -> Engine:
+    engine = Engine(concept_weights=WEIGHTS, parallel_mode=parallel_mode)
+
+    # Starting the workers up before timing, since they are reused between searches
+    engine.get_best_move(random_positions(1, seed=99)[0], 1, processes=workers)
+
+    return engine
+
+
+if __name__ == '__main__':
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    board = random_positions(1, min_plies=10, max_plies=10, seed=3)[0]
+
+    # Fresh engines for every run, so no run reuses another's tables
+    serial_time, serial_move, serial_score = timed_search(Engine(concept_weights=WEIGHTS), board, depth, 0)
+    print(f"Serial              {serial_time:>8.2f}s  score {serial_score:.6f}")
+
+    print("\nRoot splitting")
+    for workers in WORKER_COUNTS:
+        engine = started_engine(Engine.ROOT_SPLIT, workers)
+        seconds, best_move, best_score = timed_search(engine, board, depth, workers)
+        engine.close()
+
+        matches = best_move == serial_move and best_score == serial_score
+        print(f"{workers} workers  {seconds:>8.2f}s  speedup {serial_time / seconds:>5.2f}x  matches serial: {matches}")
+
+    print("\nLazy SMP (Time to depth)")
+    for workers in WORKER_COUNTS:
+        engine = started_engine(Engine.LAZY_SMP, workers)
+
+        times = []
+        for search_depth in range(1, depth + 1):
+            seconds, _best_move, _best_score = timed_search(engine, board, search_depth, workers)
+            times.append(f"d{search_depth} {seconds:>7.2f}s")
+
+        nodes_per_second = engine.worker_nodes_searched / seconds
+        engine.close()
+
+        print(f"{workers} workers  {'  '.join(times)}  {nodes_per_second:>9.1f} nodes/s")
@@ -0,0 +1,84 @@
+"""
+Checks perft counts of a set of positions against stored reference numbers, and reports the nodes per second each was
+counted at. The reference numbers were worked out with both the bitboard move generator and the per piece one in
+benchmarks.move_generation, so any change to move generation or make / undo that changes a count is a bug. Exits with a
+failure status if any count differs.
+
+Run with: python -m benchmarks.perft [max depth]
+"""
+import sys
+import time
+
+from shobu import Board
+from shobu.perft import perft
+
+
+# (Name, serialized position, perft counts from depth 1 up)
+REFERENCE_PERFT: list[tuple[str, str, tuple[int, ...]]] = [
+    (
+        "Start position",
+        "1;1;1;1;0;0;0;0;0;0;0;0;-1;-1;-1;-1||1;1;1;1;0;0;0;0;0;0;0;0;-1;-1;-1;-1||"
+        "1;1;1;1;0;0;0;0;0;0;0;0;-1;-1;-1;-1||1;1;1;1;0;0;0;0;0;0;0;0;-1;-1;-1;-1&&1&&1",
+        (232, 50508, 8675832)
+    ),
+    (
+        "Mid-game 1",
+        "0;1;1;0;0;1;0;1;0;0;-1;0;-1;-1;0;-1||0;0;0;1;1;0;0;1;0;0;0;1;-1;-1;-1;-1||"
+        "1;1;1;1;-1;0;0;-1;0;0;-1;0;0;-1;0;0||0;1;1;0;0;0;-1;1;0;-1;1;-1;-1;0;0;0&&5.0&&1",
+        (105, 12927, 1507499)
+    ),
+    (
+        "Mid-game 2",
+        "0;0;1;1;0;0;0;0;1;0;0;0;1;-1;-1;-1||0;1;0;1;0;1;0;0;1;0;0;-1;-1;-1;0;-1||"
+        "1;1;0;1;0;0;-1;-1;-1;0;1;0;0;-1;0;0||1;1;-1;1;-1;0;0;0;0;0;0;-1;0;0;-1;0&&8.0&&1",
+        (101, 12095, 1333710)
+    ),
+    (
+        "Mid-game 3",
+        "0;0;0;1;1;0;1;0;0;1;-1;0;-1;0;-1;-1||0;0;1;0;0;0;1;0;-1;1;-1;0;0;1;-1;0||"
+        "1;1;1;1;-1;0;-1;0;0;-1;0;0;0;0;0;-1||1;0;1;1;0;-1;0;-1;-1;-1;1;0;0;0;0;0&&11.0&&1",
+        (100, 12175, 1301451)
+    ),
+    # Two pieces of each color on every board, so games end within a few plies
+    (
+        "Sparse 1",
+        "0;0;0;0;0;-1;0;0;1;0;0;1;-1;0;0;0||1;0;0;0;0;0;0;-1;0;0;0;0;-1;1;0;0||"
+        "-1;0;-1;0;0;0;0;1;0;0;1;0;0;0;0;0||0;0;0;1;0;1;0;-1;0;0;0;0;0;0;0;-1&&1.0&&-1",
+        (32, 1689, 61271, 3393422)
+    ),
+    (
+        "Sparse 2",
+        "-1;0;0;1;0;0;0;0;0;1;0;0;0;0;0;-1||0;0;-1;0;-1;0;1;0;0;0;0;0;0;0;0;1||"
+        "0;0;1;0;0;0;0;0;0;0;0;0;1;-1;0;-1||0;0;1;0;0;0;0;0;0;-1;0;0;0;-1;0;1&&1.0&&-1",
+        (56, 3698, 208494, 12902722)
+    ),
+]
+
+
+if __name__ == '__main__':
+    max_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    mismatches = 0
+    total_nodes, total_seconds = 0, 0.0
+
+    for name, serial, counts in REFERENCE_PERFT:
+        board = Board(serial)
+
+        for depth, expected in enumerate(counts[:max_depth], start=1):
+            start_time = time.perf_counter()
+            nodes = perft(board, depth)
+            seconds = time.perf_counter() - start_time
+
+            total_nodes += nodes
+            total_seconds += seconds
+
+            status = "ok" if nodes == expected else f"MISMATCH (expected {expected})"
+            mismatches += nodes != expected
+
+            print(f"{name:<15} depth {depth}  {nodes:>10}  {seconds:>8.3f}s  {nodes / max(seconds, 1e-9):>12.0f} nps  {status}")
+
+    print(f"\nTotal {total_nodes} nodes in {total_seconds:.2f}s ({total_nodes / total_seconds:.0f} nps)")
+
+    if mismatches > 0:
+        print(f"{mismatches} counts differ from the reference numbers")
+        sys.exit(1)
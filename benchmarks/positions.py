@@ -0,0 +1,65 @@
+import random
+import time
+
+from shobu import Board
+
+
+def random_positions(count: int, min_plies: int = 4, max_plies: int = 16, seed: int = 0) -> list[Board]:
+    """
+    Plays seeded random games from the start position and keeps the position reached after a random number of plies.
+    Legal moves are sorted before being picked from, so the same seed gives the same positions no matter what order
+    the move generator returns them in.
+    """
+    rng = random.Random(seed)
+
+    positions: list[Board] = []
+    while len(positions) < count:
+        board = Board()
+
+        for _ in range(rng.randint(min_plies, max_plies)):
+            moves = sorted(board.get_legal_moves(), key=str)
+
+            if len(moves) == 0 or board.has_winner():
+                break
+
+            board.make_move(rng.choice(moves))
+
+        if not board.has_winner():
+            positions.append(board)
+
+    return positions
+
+
+def sparse_positions(count: int, pieces: int = 2, seed: int = 0) -> list[Board]:
+    """
+    Sets up seeded random positions with the given number of pieces of each color on every sub board, and a random
+    player to move. Few pieces means few legal moves, so these can be searched exhaustively to a few plies.
+    """
+    rng = random.Random(seed)
+
+    positions: list[Board] = []
+    for _ in range(count):
+        sub_boards = []
+        for _board in range(4):
+            values = ["0"] * 16
+            for i, square in enumerate(rng.sample(range(16), 2 * pieces)):
+                values[square] = "1" if i < pieces else "-1"
+
+            sub_boards.append(";".join(values))
+
+        player = rng.choice((Board.BLACK, Board.WHITE))
+        positions.append(Board("||".join(sub_boards) + "&&1&&" + str(player)))
+
+    return positions
+
+
+def time_function(func, trials: int) -> float:
+    """
+    Returns the average time in seconds that a single call to func takes.
+    """
+    start_time = time.perf_counter()
+
+    for _ in range(trials):
+        func()
+
+    return (time.perf_counter() - start_time) / trials
@@ -0,0 +1,53 @@
+"""
+Searches a set of positions with iterative deepening under time and node budgets, down to budgets too small to finish
+depth 1, and reports the depth each search reached and how long it took past its time limit. Every search has to return
+a move, so exits with a failure status if any returns None.
+
+Run with: python -m benchmarks.search_budget
+"""
+import sys
+import time
+
+from shobu import Board
+
+from app.engine import Engine, SearchStats
+
+from .alpha_beta import WEIGHTS
+from .positions import random_positions
+
+
+# (Time limit, node limit) of each search
+BUDGETS: list[tuple[float or None, int or None]] = [
+    (0.0, None),
+    (0.05, None),
+    (0.5, None),
+    (None, 1),
+    (None, 500),
+    (None, 20000),
+]
+
+
+if __name__ == '__main__':
+    engine = Engine(concept_weights=WEIGHTS)
+    boards = [Board()] + random_positions(3, seed=8)
+
+    failures = 0
+
+    for time_limit, node_limit in BUDGETS:
+        for i, board in enumerate(boards):
+            stats = SearchStats()
+
+            start_time = time.perf_counter()
+            best_move, best_score = engine.get_best_move(board, time_limit=time_limit, node_limit=node_limit, stats=stats)
+            seconds = time.perf_counter() - start_time
+
+            overrun = f"{seconds - time_limit:+.3f}s" if time_limit is not None else ""
+            status = "ok" if best_move is not None else "NO MOVE"
+            failures += best_move is None
+
+            print(f"Time limit {str(time_limit):<5} node limit {str(node_limit):<6} position {i}  depth {stats.depth}  "
+                  f"nodes {stats.total_nodes:>7}  {seconds:.3f}s {overrun:>8}  {status}")
+
+    if failures > 0:
+        print(f"{failures} searches returned no move")
+        sys.exit(1)
@@ -0,0 +1,61 @@
+"""
+Incremental evaluation with a fresh sub board cache, with and without the precomputed sub board table, checking that
+values from the table match the ones worked out live. Uses the table for the main profile, generating one in a
+temporary file if it is missing or stale. Exits with a failure status if any value differs.
+
+Run with: python -m benchmarks.sub_board_table
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.engine.analyze import Analyze, load_profile
+from app.engine.sub_board_table import SubBoardTable
+from app.gui.util import MAIN_EVALUATION_TABLE
+
+from .positions import random_positions
+
+
+def evaluate_children(analysis: Analyze, positions) -> tuple[list[float], float]:
+    """
+    Returns the incremental evaluation of every child of the positions, and the seconds taken.
+    """
+    scores = []
+    start_time = time.perf_counter()
+
+    for board in positions:
+        for move in board.get_legal_moves():
+            board.make_move(move)
+            scores.append(analysis.analyze_incremental(board))
+            board.undo_move()
+
+    return scores, time.perf_counter() - start_time
+
+
+if __name__ == '__main__':
+    weights = load_profile()
+
+    table_path = MAIN_EVALUATION_TABLE
+    if SubBoardTable.load(table_path, weights) is None:
+        table_path = str(Path(tempfile.mkdtemp()) / "main.eval")
+
+        start_time = time.perf_counter()
+        SubBoardTable.generate(Analyze(weights, sub_board_table_path=None), table_path)
+        print(f"Generated a table in {time.perf_counter() - start_time:.1f}s")
+
+    positions = random_positions(20, min_plies=0, max_plies=30, seed=8)
+
+    live_scores, live_time = evaluate_children(Analyze(weights, sub_board_table_path=None), positions)
+    table_scores, table_time = evaluate_children(Analyze(weights, sub_board_table_path=table_path), positions)
+
+    mismatches = sum(live != table for live, table in zip(live_scores, table_scores))
+
+    print(f"{len(live_scores)} children, each evaluated once with an empty sub board cache")
+    print(f"Worked out live  {live_time / len(live_scores) * 1e6:>8.1f} us/position")
+    print(f"Table            {table_time / len(live_scores) * 1e6:>8.1f} us/position  "
+          f"({live_time / table_time:.1f}x faster)")
+    print(f"Scores that differ: {mismatches}")
+
+    if mismatches > 0:
+        sys.exit(1)
@@ -1,9 +1,14 @@
 from app import run_gui
 
 from shobu import Board
+from shobu.perft import divide, perft
 
 from app.engine import Analyze, Engine
+from app.engine.sub_board_table import generate_table
+from app.gui.util import MAIN_ENGINE_PROFILE, MAIN_EVALUATION_TABLE
 
+import argparse
+import multiprocessing
 import time
 
 
@@ -16,8 +21,66 @@ def test_function_speed(func, trials: int):
     return time.time_ns() - start_time
 
 
+def run_perft(depth: int, serial: str = "", divide_moves: bool = False) -> None:
+    """
+    Prints the perft count of a position (The start position if no serial is given), optionally split by root move,
+    with the nodes per second it was counted at.
+    """
+    board = Board(serial)
+
+    start_time = time.perf_counter()
+    if divide_moves:
+        counts = divide(board, depth)
+        nodes = sum(count for _move, count in counts)
+    else:
+        counts = []
+        nodes = perft(board, depth)
+    seconds = time.perf_counter() - start_time
+
+    for move, count in counts:
+        print(f"{move.passive_board} {move.passive_move}  {move.aggressive_board} {move.aggressive_move}: {count}")
+
+    print(f"Nodes: {nodes}  Time: {seconds:.3f}s  NPS: {nodes / max(seconds, 1e-9):.0f}")
+
+
 if __name__ == '__main__':
-    run_gui()
+    # Needed for the engine's worker processes in the frozen Windows build
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="Shobu engine. Starts the GUI when no command is given.")
+    commands = parser.add_subparsers(dest="command")
+
+    table_parser = commands.add_parser("generate-table", help="Precompute sub board values for an engine profile")
+    table_parser.add_argument("--profile", default=MAIN_ENGINE_PROFILE)
+    table_parser.add_argument("--output", default=MAIN_EVALUATION_TABLE)
+
+    perft_parser = commands.add_parser("perft", help="Count the positions reached by legal moves to a depth")
+    perft_parser.add_argument("depth", type=int)
+    perft_parser.add_argument("--serial", default="", help="Serialized position to start from (Start position if not given)")
+    perft_parser.add_argument("--divide", action="store_true", help="Print the count below each root move")
+
+    args = parser.parse_args()
+
+    # Divide splits the count by root move, so it needs at least one move to be made
+    if args.command == "perft" and args.divide and args.depth < 1:
+        perft_parser.error("depth must be at least 1 with --divide")
+
+    elif args.command == "perft" and args.depth < 0:
+        perft_parser.error("depth must be at least 0")
+
+    if args.command == "generate-table":
+        try:
+            generate_table(args.profile, args.output)
+        except FileNotFoundError:
+            table_parser.error(f"profile {args.profile} does not exist")
+
+        print(f"Wrote sub board values for {args.profile} to {args.output}")
+
+    elif args.command == "perft":
+        run_perft(args.depth, args.serial, args.divide)
+
+    else:
+        run_gui()
     # e = Engine()
     # b = Board()
     #
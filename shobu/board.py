@@ -1,9 +1,166 @@
 import math
+import random
+import struct
+from itertools import product
 from typing import Self
 
 import numpy as np
 
-from shobu.move import Cord, Move, MovePair
+from shobu.move import BOARD_NAMES, Cord, Move, MovePair
+
+
+# Bitboard layout: square (x, y) of a sub board is bit x + 4 * y of a 16 bit mask, the same order the squares are
+# serialized in. Every sub board is stored as one mask of black pieces and one mask of white pieces.
+_FULL_MASK: int = 0xFFFF
+
+
+# Directions a piece can move in, and how many steps it can take
+_DIRECTIONS: tuple[tuple[int, int], ...] = (
+    (-1,  1), (0,  1), (1,  1),
+    (-1,  0),          (1,  0),
+    (-1, -1), (0, -1), (1, -1)
+)
+_MAGNITUDES: tuple[int, ...] = (1, 2)
+
+# Every move vector as ((dx, dy), magnitude)
+_VECTOR_STEPS: tuple[tuple[tuple[int, int], int], ...] = tuple(product(_DIRECTIONS, _MAGNITUDES))
+
+
+def _move_geometry(square: int, dx: int, dy: int, magnitude: int) -> tuple[int, int or None, int or None] or None:
+    """
+    Returns (end square, middle square, square a pushed piece lands on) of a vector played from a square, or None if the
+    move leaves the board. The middle square is None for single step moves, and the landing square is None when a
+    pushed piece falls off the board.
+    """
+    x, y = square % 4, square // 4
+
+    def square_after(steps: int) -> int or None:
+        if 0 <= x + dx * steps < 4 and 0 <= y + dy * steps < 4:
+            return x + dx * steps + 4 * (y + dy * steps)
+
+        return None
+
+    end = square_after(magnitude)
+    if end is None:
+        return None
+
+    return end, square_after(1) if magnitude == 2 else None, square_after(magnitude + 1)
+
+
+# Geometry of every vector from every square (Only depends on the two, so it is worked out once), indexed
+# [square][vector] with vectors in _VECTOR_STEPS order
+_GEOMETRY: tuple[tuple[tuple[int, int or None, int or None] or None, ...], ...] = tuple(
+    tuple(_move_geometry(square, dx, dy, magnitude) for (dx, dy), magnitude in _VECTOR_STEPS) for square in range(16)
+)
+
+
+def _reach_mask(vector: int) -> int:
+    """
+    Returns the mask of squares a vector can be played from without leaving the sub board.
+    """
+    return sum(1 << square for square in range(16) if _GEOMETRY[square][vector] is not None)
+
+
+def _push_paths() -> tuple[tuple[int, int] or None, ...]:
+    """
+    Returns (squares an aggressive move passes through or lands on, square a piece pushed by it lands on) as masks for
+    every move, the second being 0 when the pushed piece falls off the board. Indexed by the low byte of a packed move
+    (start square << 4 | end square), and None where the squares aren't a move apart.
+    """
+    paths = [None] * 256
+    for start, vectors in enumerate(_GEOMETRY):
+        for geometry in vectors:
+            if geometry is None:
+                continue
+
+            end, middle, landing = geometry
+            paths[start << 4 | end] = (
+                1 << end | (1 << middle if middle is not None else 0),
+                1 << landing if landing is not None else 0
+            )
+
+    return tuple(paths)
+
+
+_PUSH_PATHS: tuple[tuple[int, int] or None, ...] = _push_paths()
+
+
+# Squares of every set bit in a byte, used to split masks back into squares
+_LOW_SQUARES: tuple[tuple[int, ...], ...] = tuple(
+    tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)
+)
+_HIGH_SQUARES: tuple[tuple[int, ...], ...] = tuple(
+    tuple(bit + 8 for bit in squares) for squares in _LOW_SQUARES
+)
+
+
+def _vector_generation(vector: int) -> tuple:
+    """
+    Returns what move generation needs to know about a vector: (magnitude, left and right bit shifts of one step,
+    left and right bit shifts of the whole move, squares that can make the full move, squares that can take one more
+    step, and the moves ending on the squares of each value of the low and high byte of a mask). Shifting a mask left
+    then right by a pair of shifts moves every piece by that vector. Moves are packed as start square << 4 | end square.
+    """
+    (dx, dy), magnitude = _VECTOR_STEPS[vector]
+    step = dx + 4 * dy
+    offset = step * magnitude
+
+    low_codes, high_codes = (
+        tuple(tuple((end - offset) % 16 << 4 | end for end in ends) for ends in squares)
+        for squares in (_LOW_SQUARES, _HIGH_SQUARES)
+    )
+
+    return (
+        magnitude,
+        max(step, 0), max(-step, 0),
+        max(offset, 0), max(-offset, 0),
+        _reach_mask(vector), _reach_mask(_VECTOR_STEPS.index(((dx, dy), 1))),
+        low_codes, high_codes
+    )
+
+
+_CORDS: tuple[Cord, ...] = tuple(Cord(square % 4, square // 4) for square in range(16))
+
+# Interned move between every two squares, indexed [start square][end square]
+_MOVES: tuple[tuple[Move, ...], ...] = tuple(tuple(Move(start, end) for end in _CORDS) for start in _CORDS)
+
+
+# Zobrist keys, seeded so every process hashes positions the same way. One key per (sub board, color, square), and one
+# for white being the side to move.
+_zobrist_random = random.Random(0x5B0B)
+
+_ZOBRIST_SQUARES: tuple[tuple[int, ...], ...] = tuple(
+    tuple(_zobrist_random.getrandbits(64) for _square in range(16)) for _board_color in range(8)
+)
+_ZOBRIST_WHITE_TO_MOVE: int = _zobrist_random.getrandbits(64)
+
+
+def _combine_keys(keys: tuple[int, ...], byte: int) -> tuple[int, ...]:
+    """
+    Returns the xor of the keys of every square set in each possible value of one byte of a mask.
+    """
+    combined = []
+    for value in range(256):
+        key = 0
+        for bit in range(8):
+            if value >> bit & 1:
+                key ^= keys[8 * byte + bit]
+
+        combined.append(key)
+
+    return tuple(combined)
+
+
+# Square keys pre-combined per byte of a mask, so a whole mask hashes with two lookups.
+# Indexed [(board * 2 + color) * 2 + byte][byte value], with color 0 for black and 1 for white.
+_ZOBRIST_BYTES: tuple[tuple[int, ...], ...] = tuple(
+    _combine_keys(keys, byte) for keys in _ZOBRIST_SQUARES for byte in range(2)
+)
+
+
+def _zobrist_mask(board: int, color: int, mask: int) -> int:
+    index = (board * 2 + color) * 2
+    return _ZOBRIST_BYTES[index][mask & 0xFF] ^ _ZOBRIST_BYTES[index + 1][mask >> 8]
 
 
 class Board:
@@ -16,242 +173,401 @@ class Board:
     BLACK: int        =  1
     WHITE: int        = -1
 
-    # Used for getting legal moves
-    _DIRECTIONS = (
-        [-1,  1], [0,  1], [1,  1],
-        [-1,  0],          [1,  0],
-        [-1, -1], [0, -1], [1, -1]
-    )
-    _MAGNITUDES = {1, 2}
+    # Every move vector laid out for move generation (See _vector_generation), with everything read off the geometry
+    # table. The mask of squares that can take one more step tells if a pushed piece lands on the board or falls off it
+    _VECTORS: tuple[tuple, ...] = tuple(_vector_generation(vector) for vector in range(len(_VECTOR_STEPS)))
+
+    # Sub boards in the order they are serialized in
+    _BOARD_KEYS: tuple[str, ...] = BOARD_NAMES
+
+    # Boards an aggressive move can be played on for a passive move on each board (Other side, then other color)
+    _ADJACENT_BOARDS: tuple[tuple[int, int], ...] = ((1, 2), (0, 3), (3, 0), (2, 1))
+
+    # What an aggressive move does to an opponent's piece
+    PUSH_NONE:     int = 0
+    PUSH_ON_BOARD: int = 1
+    PUSH_OFF:      int = 2
+
+    _START_BLACK_MASK: int = 0x000F
+    _START_WHITE_MASK: int = 0xF000
+
+    # Binary position format (See to_bytes): black masks, white masks, turn number in halves and the player to move.
+    # POSITION_DTYPE lays out the same bytes as a NumPy record
+    _POSITION_STRUCT: struct.Struct = struct.Struct("<4H4HHb")
+    POSITION_SIZE: int = _POSITION_STRUCT.size
+    POSITION_DTYPE: np.dtype = np.dtype([
+        ("black", "<u2", (4,)), ("white", "<u2", (4,)), ("half_turns", "<u2"), ("player", "i1")
+    ])
+
+    # Bit of every square laid out as a [x][y] array, for turning masks back into arrays
+    _ARRAY_SHIFTS: np.array = np.arange(16).reshape(4, 4).T
 
     def __init__(self, serialized_string: str = ""):
-        self._boards: dict[str, np.array] = {
-            "blackLeft":  None,
-            "blackRight": None,
-            "whiteLeft":  None,
-            "whiteRight": None
-        }
+        # Black and white piece masks for every sub board
+        self._black: list[int] = [0, 0, 0, 0]
+        self._white: list[int] = [0, 0, 0, 0]
+
+        # Black and white pieces left on every sub board, only changing when a piece is pushed off
+        self._black_counts: list[int] = [0, 0, 0, 0]
+        self._white_counts: list[int] = [0, 0, 0, 0]
 
         # Tracking number of turns and current player
         self._current_player = self.BLACK
         self._turn_number: float = 1
 
-        self._move_stack: list[tuple[MovePair, str]] = []
+        # Zobrist hash of the piece placement and side to move, kept up to date by make_move / undo_move
+        self._hash: int = 0
+
+        # Values an evaluator keeps for each sub board (See get_sub_board_values), None where a sub board has changed
+        self._sub_board_values: list = [None] * 4
+        self._sub_board_values_key: object = None
 
+        # Moves made, each with the undo record needed to take it back:
+        # (passive board, its black and white masks, aggressive board, its black and white masks and piece counts, turn
+        # number, player, winner, hash, passive and aggressive board values, key of those values). Moves are kept the
+        # way they were made, as a MovePair or as a packed int (See encode_move)
+        self._move_stack: list[tuple[MovePair or int, tuple]] = []
+
+        # Player that emptied one of the other player's sub boards, kept up to date by make_move / undo_move
         self._winner = None
 
         # Setting board up (Default if serialized string is empty, otherwise set it up to that position
         self.reset()
 
         if serialized_string != "":
-            # Splitting up the metadata (Board content, turn number, current player turn
-            meta_split = serialized_string.split("&&")
-
-            # Setting meta game data
-            self._turn_number = float(meta_split[1])
-            self._current_player = int(meta_split[2])
-
-            # Extracting the board positions from the string (4 sub boards with arrays that are ints)
-            parsed_sub_boards = [[int(x) for x in s.split(';')] for s in meta_split[0].split("||")]
-
-            # Setting each piece into it's square
-            for i, sub_board_values in enumerate(parsed_sub_boards):
-                sub_board = list(self._boards.keys())[i]
-                for j in range(len(sub_board_values)):
-                    x = j % 4
-                    y = j // 4
-
-                    self._boards[sub_board][x][y] = sub_board_values[j]
+            self.load(serialized_string)
 
     def reset(self) -> None:
         """
         Resets the boards to the start position.
         """
-        for board in self._boards:
-            # Setting up a 4x4 board
-            self._boards[board] = np.array([
-                [self._BLACK_PIECE, self._NO_PIECE, self._NO_PIECE, self._WHITE_PIECE],
-                [self._BLACK_PIECE, self._NO_PIECE, self._NO_PIECE, self._WHITE_PIECE],
-                [self._BLACK_PIECE, self._NO_PIECE, self._NO_PIECE, self._WHITE_PIECE],
-                [self._BLACK_PIECE, self._NO_PIECE, self._NO_PIECE, self._WHITE_PIECE],
-            ])
+        self._black = [self._START_BLACK_MASK] * 4
+        self._white = [self._START_WHITE_MASK] * 4
+
+        self._black_counts = [self._START_BLACK_MASK.bit_count()] * 4
+        self._white_counts = [self._START_WHITE_MASK.bit_count()] * 4
+        self._winner = None
 
         self._current_player = Board.BLACK
         self._turn_number = 1
         self._move_stack.clear()
 
+        self._hash = self._compute_hash()
+        self._sub_board_values = [None] * 4
+
     def load(self, serial):
         # Splitting up the metadata (Board content, turn number, current player turn
         meta_split = serial.split("&&")
 
-        # Setting meta game data
-        self._turn_number = float(meta_split[1])
-        self._current_player = int(meta_split[2])
+        # Setting each piece into it's square (4 sub boards with 16 squares each)
+        black_masks, white_masks = [], []
+        for sub_board_values in meta_split[0].split("||"):
+            black, white = 0, 0
+            for square, value in enumerate(sub_board_values.split(";")):
+                piece = int(value)
 
-        # Extracting the board positions from the string (4 sub boards with arrays that are ints)
-        parsed_sub_boards = [[int(x) for x in s.split(';')] for s in meta_split[0].split("||")]
+                if piece == self._BLACK_PIECE:
+                    black |= 1 << square
 
-        # Setting each piece into it's square
-        for i, sub_board_values in enumerate(parsed_sub_boards):
-            sub_board = list(self._boards.keys())[i]
-            for j in range(len(sub_board_values)):
-                x = j % 4
-                y = j // 4
+                elif piece == self._WHITE_PIECE:
+                    white |= 1 << square
 
-                self._boards[sub_board][x][y] = sub_board_values[j]
+            black_masks.append(black)
+            white_masks.append(white)
 
-    @staticmethod
-    def _get_adjacent_boards(board: str) -> tuple[str, str]:
-        is_black: bool = "black" in board
-        is_left: bool  = "Left" in board
+        # Setting meta game data (Turn number, current player turn)
+        self._set_position(black_masks, white_masks, float(meta_split[1]), int(meta_split[2]))
+
+    def _set_position(self, black: list[int], white: list[int], turn_number: float, player: int) -> None:
+        """
+        Sets up a position from its masks, turn number and player to move. Moves already made are kept.
+        """
+        self._black = list(black)
+        self._white = list(white)
 
-        opposite_side_board = ("black" if is_black else "white") + ("Right" if is_left else "Left")
-        opposite_color_board = ("white" if is_black else "black") + ("Left" if is_left else "Right")
+        self._turn_number = turn_number
+        self._current_player = player
 
-        return opposite_side_board, opposite_color_board
-    def _get_opposite_color(self, color: WHITE or BLACK) -> WHITE or BLACK:
-        return self.WHITE if color == self.BLACK else self.BLACK
+        self._black_counts = [black.bit_count() for black in self._black]
+        self._white_counts = [white.bit_count() for white in self._white]
+        self._winner = self._find_winner()
 
-    def has_winner(self) -> bool:
-        for sub_board in self._boards:
-            if np.sum(self._boards[sub_board] == Board.BLACK) == 0:
-                self._winner = self.BLACK
-                return True
+        self._hash = self._compute_hash()
+        self._sub_board_values = [None] * 4
 
-            elif np.sum(self._boards[sub_board] == Board.WHITE) == 0:
-                self._winner = self.WHITE
-                return True
+    def _find_winner(self) -> int or None:
+        """
+        Works out the winner from the piece counts: the first sub board missing a color has been lost by that color.
+        """
+        for black_count, white_count in zip(self._black_counts, self._white_counts):
+            if black_count == 0:
+                return self.WHITE
 
-        return False
+            if white_count == 0:
+                return self.BLACK
 
-    def make_move(self, move: MovePair):
-        self._turn_number += 0.5
+        return None
 
-        # Making Passive move (Setting previous location to nothing, and moving it to new one)
-        passive_piece: str = self._boards[move.passive_board][move.passive_move.start.x][move.passive_move.start.y]
+    def _compute_hash(self) -> int:
+        """
+        Hashes the whole position from scratch. Only needed when a position is set up, moves update the hash in place.
+        """
+        board_hash = _ZOBRIST_WHITE_TO_MOVE if self._current_player == self.WHITE else 0
 
-        self._boards[move.passive_board][move.passive_move.start.x][move.passive_move.start.y] = self._NO_PIECE
-        self._boards[move.passive_board][move.passive_move.end.x][move.passive_move.end.y] = passive_piece
+        for board, (black, white) in enumerate(zip(self._black, self._white)):
+            board_hash ^= _zobrist_mask(board, 0, black) ^ _zobrist_mask(board, 1, white)
 
-        # Aggressive move (Moving previous piece to new position, and pushing any pieces)
-        pushed_to_cord = move.aggressive_move.end + move.aggressive_move.normalized_difference
-        moving_piece = self._boards[move.aggressive_board][move.aggressive_move.start.x][move.aggressive_move.start.y]
+        return board_hash
 
-        end_piece = self._boards[move.aggressive_board][move.aggressive_move.end.x][move.aggressive_move.end.y]
+    def _get_piece_masks(self, board: int, square_bit: int) -> list[int] or None:
+        """
+        Returns the mask list (Black or white) that has a piece on the given square, or None if the square is empty.
+        """
+        if self._black[board] & square_bit:
+            return self._black
 
-        if move.aggressive_move.magnitude == 2:
-            # Getting the middle cord that the moving piece passes through
-            middle_cord  = move.aggressive_move.start + move.aggressive_move.normalized_difference
-            middle_piece = self._boards[move.aggressive_board][middle_cord.x][middle_cord.y]
+        if self._white[board] & square_bit:
+            return self._white
 
-            # Moving the piece, and emptying the middle piece
-            self._boards[move.aggressive_board][move.aggressive_move.start.x][move.aggressive_move.start.y] = self._NO_PIECE
-            self._boards[move.aggressive_board][middle_cord.x][middle_cord.y] = self._NO_PIECE
-            self._boards[move.aggressive_board][move.aggressive_move.end.x][move.aggressive_move.end.y] = moving_piece
+        return None
 
-            if pushed_to_cord.valid and (middle_piece != self.NONE or end_piece != self.NONE):
-                self._boards[move.aggressive_board][pushed_to_cord.x][pushed_to_cord.y] = middle_piece if middle_piece != self._NO_PIECE else end_piece
+    def has_winner(self) -> bool:
+        return self._winner is not None
 
-        else:
-            self._boards[move.aggressive_board][move.aggressive_move.start.x][move.aggressive_move.start.y] = self._NO_PIECE
-            self._boards[move.aggressive_board][move.aggressive_move.end.x][move.aggressive_move.end.y] = moving_piece
+    @property
+    def is_terminal(self) -> bool:
+        """
+        Whether the game is over, with a sub board missing a color. The winner is kept up to date as moves are made and
+        undone, so this is a single check with no side effects.
+        """
+        return self._winner is not None
 
-            if end_piece != self._NO_PIECE and pushed_to_cord.valid:
-                self._boards[move.aggressive_board][pushed_to_cord.x][pushed_to_cord.y] = end_piece
+    def make_move(self, move: MovePair):
+        self._move_stack.append((move, self._play(self.encode_move(move))))
 
-        # Switching whose turn it is
-        self._current_player *= -1 # This just swaps it
+    def make_move_encoded(self, code: int) -> None:
+        """
+        Makes a move packed into an int (See encode_move), without building a MovePair for it.
+        """
+        self._move_stack.append((code, self._play(code)))
 
-        # Updating history
-        self._move_stack.append((move, self.serialized_string))
+    def _play(self, code: int) -> tuple:
+        """
+        Plays a packed move on the masks, turn and hash, returning the undo record for it.
+        """
+        passive_board = code >> 18
+        aggressive_board = code >> 8 & 0x3
+
+        # Only the two boards played on change, so their masks and the turn data are all an undo needs
+        undo_record = (
+            passive_board, self._black[passive_board], self._white[passive_board],
+            aggressive_board, self._black[aggressive_board], self._white[aggressive_board],
+            self._black_counts[aggressive_board], self._white_counts[aggressive_board],
+            self._turn_number, self._current_player, self._winner, self._hash,
+            self._sub_board_values[passive_board], self._sub_board_values[aggressive_board], self._sub_board_values_key
+        )
 
-    def undo_move(self):
-        self.load(self._move_stack[-1][1])
+        self._turn_number += 0.5
 
-        self._move_stack.pop()
+        # Values kept for the two boards played on no longer apply
+        self._sub_board_values[passive_board] = self._sub_board_values[aggressive_board] = None
 
-    def get_legal_moves(self):
-        board_color_key: str = "black" if self._current_player == self.BLACK else "white"
+        # Making Passive move (Clearing the start square, and moving the piece to the end one)
+        start_bit = 1 << (code >> 14 & 0xF)
+        end_bit   = 1 << (code >> 10 & 0xF)
 
-        # Getting passive moves that cannot interfere with other pieces, and can only be played on your own board
-        passive_moves: list[tuple[Move, str]] = []
-        for board in [board_color_key + "Left", board_color_key + "Right"]:
-            for x in range(4):
-                for y in range(4):
-                    # Getting location of piece if it is desired color
-                    if self._boards[board][x][y] == self._current_player:
-                        start: Cord = Cord(x, y)
+        passive_masks = self._get_piece_masks(passive_board, start_bit)
+        passive_masks[passive_board] = (passive_masks[passive_board] & ~start_bit) | end_bit
 
-                        # Testing directions to see if they are (A) Blocked by a piece (B) Out of bounds
-                        # If it is valid, adding it to the list of passive moves that are viable
-                        for direction in self._DIRECTIONS:
-                            for magnitude in self._MAGNITUDES:
-                                end: Cord = start + Cord(direction[0] * magnitude, direction[1] * magnitude)
+        # Aggressive move (Moving previous piece to new position, and pushing any pieces)
+        start_bit = 1 << (code >> 4 & 0xF)
+        end_bit   = 1 << (code & 0xF)
 
-                                if not end.valid:
-                                    continue
+        path_bits, landing_bit = _PUSH_PATHS[code & 0xFF]
 
-                                if magnitude == 1:
-                                    if self._boards[board][end.x][end.y] == self._NO_PIECE:
-                                        passive_moves.append((Move(start, end), board))
+        moving_masks = self._get_piece_masks(aggressive_board, start_bit)
 
-                                else:
-                                    middle: Cord = start + Cord(direction[0], direction[1])
-                                    if self._boards[board][end.x][end.y] == self._NO_PIECE and self._boards[board][middle.x][middle.y] == self._NO_PIECE:
-                                        passive_moves.append((Move(start, end), board))
+        pushed_masks = self._get_piece_masks(aggressive_board, path_bits)
+        if pushed_masks is not None:
+            # Pushed piece lands one square past the end of the move, or falls off the board
+            pushed_masks[aggressive_board] = (pushed_masks[aggressive_board] & ~path_bits) | landing_bit
 
-        moves: list[MovePair] = []
-        for passive in passive_moves:
-            adjacent_boards = self._get_adjacent_boards(passive[1])
+            # A piece pushed off is lost, and taking the last one off a board wins the game
+            if not landing_bit:
+                pushed_counts = self._black_counts if pushed_masks is self._black else self._white_counts
+                pushed_counts[aggressive_board] -= 1
 
-            for board in adjacent_boards:
-                for x in range(4):
-                    for y in range(4):
-                        if self._boards[board][x][y] == self._current_player:
-                            start: Cord = Cord(x, y)
-                            end: Cord = start + passive[0].difference
+                if pushed_counts[aggressive_board] == 0 and self._winner is None:
+                    self._winner = self.WHITE if pushed_masks is self._black else self.BLACK
 
-                            if not end.valid: # If move is out of bounds for this new piece, move on
-                                continue
+        moving_masks[aggressive_board] = (moving_masks[aggressive_board] & ~start_bit) | end_bit
 
-                            move: MovePair = MovePair(
-                                passive[0], # Passive Move
-                                Move(start, end), # Aggressive Move
-                                passive[1], # Passive Board
-                                board, # Aggressive Board
-                            )
+        # Switching whose turn it is
+        self._current_player *= -1 # This just swaps it
 
-                            if abs(passive[0].difference.x) == 1 or abs(passive[0].difference.y) == 1:
-                                if self._boards[board][end.x][end.y] == self._NO_PIECE: # Empty Square being moved to
-                                    moves.append(move)
+        # Swapping the old masks of both boards out of the hash and the new ones in
+        self._hash ^= (
+            _ZOBRIST_WHITE_TO_MOVE ^
+            _zobrist_mask(passive_board, 0, undo_record[1] ^ self._black[passive_board]) ^
+            _zobrist_mask(passive_board, 1, undo_record[2] ^ self._white[passive_board]) ^
+            _zobrist_mask(aggressive_board, 0, undo_record[4] ^ self._black[aggressive_board]) ^
+            _zobrist_mask(aggressive_board, 1, undo_record[5] ^ self._white[aggressive_board])
+        )
 
-                                elif self._boards[board][end.x][end.y] == self._get_opposite_color(self._current_player): # An opposite color piece is being attacked
-                                    behind_attacked_piece: Cord = end + passive[0].difference
+        return undo_record
 
-                                    if not behind_attacked_piece.valid: # If there is no more board after it, it can be pushed off
-                                        moves.append(move)
+    def get_push_type(self, move: MovePair) -> int:
+        """
+        Returns whether the aggressive half of a move pushes an opponent's piece, and if so whether it is pushed off
+        the board. Checks only the squares in the move's path, so it is cheap enough for move ordering.
+        """
+        return self.get_push_type_encoded(self.encode_move(move))
 
-                                    elif self._boards[board][behind_attacked_piece.x][behind_attacked_piece.y] == self._NO_PIECE: # If there is empty space behind it, it can be pushed there
-                                        moves.append(move)
+    def get_push_type_encoded(self, code: int) -> int:
+        """
+        Same as get_push_type, for a packed move.
+        """
+        path_bits, landing_bit = _PUSH_PATHS[code & 0xFF]
 
-                            else:
-                                after_end: Cord = end + passive[0].normalized_difference
+        opponent = self._white if self._current_player == self.BLACK else self._black
+        if not opponent[code >> 8 & 0x3] & path_bits:
+            return self.PUSH_NONE
 
-                                destination: str = self._boards[board][end.x][end.y]
-                                middle: str = self._boards[board][start.x + passive[0].normalized_difference.x][start.y + passive[0].normalized_difference.y]
+        return self.PUSH_ON_BOARD if landing_bit else self.PUSH_OFF
 
-                                if destination == self._NO_PIECE and middle == self._NO_PIECE: # Checking to see if no pieces are in the way
-                                    moves.append(move)
+    def undo_move(self):
+        _move, undo_record = self._move_stack.pop()
+
+        (
+            passive_board, passive_black, passive_white,
+            aggressive_board, aggressive_black, aggressive_white,
+            self._black_counts[aggressive_board], self._white_counts[aggressive_board],
+            self._turn_number, self._current_player, self._winner, self._hash,
+            passive_value, aggressive_value, values_key
+        ) = undo_record
+
+        self._black[passive_board], self._white[passive_board] = passive_black, passive_white
+        self._black[aggressive_board], self._white[aggressive_board] = aggressive_black, aggressive_white
+
+        # Values from before the move are only put back if they were kept by the same evaluator
+        if values_key is self._sub_board_values_key:
+            self._sub_board_values[passive_board] = passive_value
+            self._sub_board_values[aggressive_board] = aggressive_value
+        else:
+            self._sub_board_values[passive_board] = self._sub_board_values[aggressive_board] = None
 
-                                elif middle == self._current_player or destination == self._current_player: # Checking if a single piece of your own color is in the way
-                                    continue
+    # Moves are taken back the same way however they were made
+    undo_move_encoded = undo_move
 
-                                elif (middle == self._get_opposite_color(self._current_player)) ^ (destination == self._get_opposite_color(self._current_player)): # Checking to see if there is only one opposite colored piece in the way
-                                    if not after_end.valid or self._boards[board][after_end.x][after_end.y] == self._NO_PIECE: # Seeing if it gets pushed to open space, or off the board
-                                        moves.append(move)
+    def get_legal_moves(self) -> list[MovePair]:
+        # Decoding inline, the same way decode_move does
+        return [
+            MovePair(
+                _MOVES[code >> 14 & 0xF][code >> 10 & 0xF], _MOVES[code >> 4 & 0xF][code & 0xF], code >> 18, code >> 8 & 0x3
+            )
+            for code in self.get_legal_moves_encoded()
+        ]
+
+    def get_legal_moves_encoded(self) -> list[int]:
+        """
+        Returns the legal moves packed into ints (See encode_move), in the same order as get_legal_moves.
+        Generated one vector at a time: the passive moves of a home board and the aggressive moves of each adjacent
+        board along the vector are found for all pieces at once, and every pairing of the two is a legal move.
+        """
+        if self._current_player == self.BLACK:
+            own, opponent, home_boards = self._black, self._white, (0, 1)
+        else:
+            own, opponent, home_boards = self._white, self._black, (2, 3)
+
+        # Empty squares of every board, which don't change between vectors
+        empty = [~(own_mask | opponent_mask) & _FULL_MASK for own_mask, opponent_mask in zip(own, opponent)]
+
+        moves: list[int] = []
+        for passive_board in home_boards:
+            passive_own, passive_empty = own[passive_board], empty[passive_board]
+            passive_bits = passive_board << 18
+
+            aggressive_boards = [
+                (board << 8, own[board], opponent[board], empty[board]) for board in self._ADJACENT_BOARDS[passive_board]
+            ]
+
+            for magnitude, left, right, move_left, move_right, reach_mask, step_mask, low_codes, high_codes in self._VECTORS:
+                # Passive moves cannot interfere with other pieces, so every square passed through or landed on has to
+                # be empty
+                passive_ends = ((passive_own & reach_mask) << left >> right) & passive_empty
+                if magnitude == 2:
+                    passive_ends = (passive_ends << left >> right) & passive_empty
+
+                if not passive_ends:
+                    continue
+
+                # The same vector then has to be played aggressively on one of the adjacent boards. At most one opponent
+                # piece can be in the way, and it has to be pushed onto an empty square or off the board
+                aggressive_codes = []
+                for board_bits, board_own, board_opponent, board_empty in aggressive_boards:
+                    ends = (board_own & reach_mask) << move_left >> move_right
+
+                    # Whether a piece on a square could be pushed one step further (Off the board, or onto an empty square)
+                    pushable = ~step_mask | ((board_empty << right >> left) & step_mask)
+
+                    if magnitude == 1:
+                        ends &= board_empty | (board_opponent & pushable)
+                    else:
+                        # Shifting the middle square of the move onto its end square, so both can be checked at once
+                        middle_opponent = board_opponent << left >> right
+                        ends &= (
+                            ((board_empty << left >> right) & board_empty) |
+                            ((middle_opponent ^ board_opponent) & ~(board_own << left >> right) & ~board_own & pushable)
+                        )
+
+                    aggressive_codes += [board_bits | code for code in low_codes[ends & 0xFF] + high_codes[ends >> 8]]
+
+                moves += [
+                    passive_code | aggressive_code
+                    for passive_code in [
+                        passive_bits | code << 10 for code in low_codes[passive_ends & 0xFF] + high_codes[passive_ends >> 8]
+                    ]
+                    for aggressive_code in aggressive_codes
+                ]
 
         return moves
 
+    def get_legal_moves_array(self) -> np.ndarray:
+        """
+        Returns the packed legal moves as a uint32 array. Moves are made from it with make_move_encoded(int(code)), or
+        after turning it back into a list with tolist().
+        """
+        return np.array(self.get_legal_moves_encoded(), dtype=np.uint32)
+
+    @classmethod
+    def encode_move(cls, move: MovePair) -> int:
+        """
+        Packs a move into a 20 bit int: passive board, passive start and end squares, aggressive board, aggressive start
+        and end squares (2 + 4 + 4 + 2 + 4 + 4 bits, from high to low).
+        """
+        passive, aggressive = move.passive_move, move.aggressive_move
+
+        return (
+            move.passive_board_index << 18 |
+            passive.start.square << 14 |
+            passive.end.square << 10 |
+            move.aggressive_board_index << 8 |
+            aggressive.start.square << 4 |
+            aggressive.end.square
+        )
+
+    @classmethod
+    def decode_move(cls, code: int) -> MovePair:
+        # Codes can also come from a uint32 array
+        code = int(code)
+
+        return MovePair(
+            _MOVES[code >> 14 & 0xF][code >> 10 & 0xF],
+            _MOVES[code >> 4 & 0xF][code & 0xF],
+            code >> 18 & 0x3,
+            code >> 8 & 0x3,
+        )
+
     def get_mock(self, move: MovePair, keep_metadata: bool = True, keep_moves: bool = False):
         mock = self.copy(keep_metadata=keep_metadata, keep_moves=keep_moves)
 
@@ -266,26 +582,100 @@ class Board:
         # Transferring over other data that isn't board position
         if keep_metadata:
             new_board._turn_number = self._turn_number
-            new_board._winner = self._winner
         new_board._current_player = self._current_player
 
         if keep_moves:
             new_board._move_stack = self._move_stack.copy()
 
-        # Deep copy the boards
-        new_board._boards = {
-            key: np.copy(value) for key, value in self._boards.items()
-        }
+        # Copying the bitboards (Lists of ints, so a shallow copy is enough)
+        new_board._black = self._black.copy()
+        new_board._white = self._white.copy()
+        new_board._hash = self._hash
+
+        # Piece counts and the winner follow from the pieces, so they are copied along with them
+        new_board._black_counts = self._black_counts.copy()
+        new_board._white_counts = self._white_counts.copy()
+        new_board._winner = self._winner
+
+        new_board._sub_board_values = self._sub_board_values.copy()
+        new_board._sub_board_values_key = self._sub_board_values_key
 
         return new_board
 
+    def get_sub_board_values(self, key: object) -> list:
+        """
+        Returns the list of values an evaluator keeps for each sub board, so it only has to work out values for the sub
+        boards that changed. Entries are None where a sub board has changed since its value was stored: make_move
+        clears the two boards it plays on, and undo_move puts their old values back. The key identifies what the values
+        were worked out with, and passing a different one than last time clears them all.
+        """
+        if key is not self._sub_board_values_key:
+            self._sub_board_values = [None] * 4
+            self._sub_board_values_key = key
+
+        return self._sub_board_values
+
+    @property
+    def piece_masks(self) -> tuple[tuple[int, ...], tuple[int, ...]]:
+        """
+        Black and white piece masks of every sub board, as (black masks, white masks). Square (x, y) is bit x + 4y.
+        """
+        return tuple(self._black), tuple(self._white)
+
     @property
     def boards(self) -> dict[str, np.array]:
-        return self._boards
+        """
+        4x4 arrays of every sub board, indexed [x][y]. These are built from the bitboards on each access, so writing to
+        them does not change the board.
+        """
+        return {
+            key: ((black >> self._ARRAY_SHIFTS) & 1) - ((white >> self._ARRAY_SHIFTS) & 1)
+            for key, black, white in zip(self._BOARD_KEYS, self._black, self._white)
+        }
+
+    def to_array(self) -> np.ndarray:
+        """
+        Returns every sub board stacked into one (4, 4, 4) int8 array, indexed [board][x][y] with boards in serialization
+        order.
+        """
+        return self.masks_to_array(np.array(self._black), np.array(self._white))
+
+    def get_children_array(self, moves: list[int] or None = None) -> np.ndarray:
+        """
+        Returns the position after each packed move (All legal moves if none are given) as one (N, 4, 4, 4) int8 array,
+        laid out like to_array(). The moves are made and undone on this board, so it is unchanged afterwards.
+        """
+        if moves is None:
+            moves = self.get_legal_moves_encoded()
+
+        masks = np.empty((len(moves), 2, 4), dtype=np.int64)
+
+        for i, move in enumerate(moves):
+            self.make_move_encoded(move)
+            masks[i] = (self._black, self._white)
+            self.undo_move()
+
+        return self.masks_to_array(masks[:, 0], masks[:, 1])
+
+    @classmethod
+    def masks_to_array(cls, black: np.ndarray, white: np.ndarray) -> np.ndarray:
+        """
+        Turns arrays of black and white sub board masks, shaped (..., 4), into (..., 4, 4, 4) int8 arrays of pieces.
+        """
+        black, white = black[..., None, None], white[..., None, None]
+
+        return (((black >> cls._ARRAY_SHIFTS) & 1) - ((white >> cls._ARRAY_SHIFTS) & 1)).astype(np.int8)
 
     @property
-    def board_keys(self) -> dict.keys:
-        return self._boards.keys()
+    def piece_counts(self) -> tuple[tuple[int, ...], tuple[int, ...]]:
+        """
+        Black and white pieces left on every sub board, as (black counts, white counts).
+        """
+        return tuple(self._black_counts), tuple(self._white_counts)
+
+    @property
+    def board_keys(self) -> tuple[str, ...]:
+        return self._BOARD_KEYS
 
     @property
     def current_player_turn(self) -> int:
@@ -297,15 +687,33 @@ class Board:
 
     @property
     def moves_made(self) -> list[MovePair]:
-        return [move[0] for move in self._move_stack]
+        return [move if isinstance(move, MovePair) else self.decode_move(move) for move, _undo_record in self._move_stack]
 
     @property
     def last_move(self) -> MovePair:
         return self.moves_made[-1]
 
     @property
-    def history(self):
-        return [serial[1] for serial in self._move_stack]
+    def history(self) -> list[str]:
+        """
+        Serialized strings of the position after each move made. These are rebuilt by undoing the moves on a copy, so
+        this is not meant for use in search.
+        """
+        board = self.copy(keep_moves=True)
+
+        serials: list[str] = []
+        while board._move_stack:
+            serials.append(board.serialized_string)
+            board.undo_move()
+
+        return serials[::-1]
+
+    @property
+    def hash(self) -> int:
+        """
+        64 bit Zobrist hash of the piece placement on all four sub boards and the side to move.
+        """
+        return self._hash
 
     @property
     def winner(self) -> None or int:
@@ -313,24 +721,68 @@ class Board:
 
     @property
     def serialized_string(self):
-        end_string = ""
-        for sub_board in self._boards:
-            for y in range(4):
-                for x in range(4):
-                    end_string += str(self._boards[sub_board][x][y]) + ";"
+        sub_board_strings = [
+            ";".join("1" if black >> square & 1 else "-1" if white >> square & 1 else "0" for square in range(16))
+            for black, white in zip(self._black, self._white)
+        ]
 
-            end_string = end_string.rstrip(";") + "||"
-
-        end_string = end_string.rstrip("||") + "&&" + str(self._turn_number) + "&&" + str(self._current_player)
-
-        return end_string
+        return "||".join(sub_board_strings) + "&&" + str(self._turn_number) + "&&" + str(self._current_player)
 
     @staticmethod
     def get_player_turn_from_serial(serial: str):
         return int(serial.split("&&")[-1])
 
+    def to_bytes(self) -> bytes:
+        """
+        Packs the position into POSITION_SIZE bytes: the black then white mask of every sub board as little endian 16
+        bit ints, twice the turn number as one more (Every move adds half a turn), and the player to move as a signed
+        byte. Much cheaper to build and parse than serialized_string, holding the same information.
+        """
+        return self._POSITION_STRUCT.pack(*self._black, *self._white, round(self._turn_number * 2), self._current_player)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Self:
+        """
+        Returns the board packed by to_bytes.
+        """
+        values = cls._POSITION_STRUCT.unpack(data)
+
+        board = cls()
+        board._set_position(values[0:4], values[4:8], values[8] / 2, values[9])
+
+        return board
+
+    @classmethod
+    def encode_many(cls, boards: list[Self]) -> np.ndarray:
+        """
+        Packs boards into an array of POSITION_DTYPE records, laid out the same way as to_bytes (So its tobytes() is
+        every board's bytes one after another, and np.frombuffer(data, Board.POSITION_DTYPE) reads them back).
+        """
+        return np.frombuffer(b"".join(board.to_bytes() for board in boards), dtype=cls.POSITION_DTYPE)
+
+    @classmethod
+    def decode_many(cls, positions: np.ndarray) -> list[Self]:
+        """
+        Returns the boards of an array of POSITION_DTYPE records.
+        """
+        boards = []
+        for black, white, half_turns, player in positions.tolist():
+            board = cls()
+            board._set_position(black, white, half_turns / 2, player)
+            boards.append(board)
+
+        return boards
+
+    @classmethod
+    def positions_to_array(cls, positions: np.ndarray) -> np.ndarray:
+        """
+        Turns an array of POSITION_DTYPE records into (..., 4, 4, 4) int8 arrays of pieces, laid out like to_array(),
+        without building any boards.
+        """
+        return cls.masks_to_array(positions["black"].astype(np.int64), positions["white"].astype(np.int64))
+
     def __copy__(self):
-        return Board(self.serialized_string)
+        return self.copy()
 
     def __str__(self):
         """
@@ -347,10 +799,12 @@ class Board:
             # Transpose the 4x4 board and reverse columns to turn them upright
             return [[format_piece(half_board[x][y]) for x in range(3, -1, -1)] for y in reversed(range(4))]
 
-        white_left = get_column_strings(self._boards["whiteLeft"])
-        white_right = get_column_strings(self._boards["whiteRight"])
-        black_left = get_column_strings(self._boards["blackLeft"])
-        black_right = get_column_strings(self._boards["blackRight"])
+        boards = self.boards
+
+        white_left = get_column_strings(boards["whiteLeft"])
+        white_right = get_column_strings(boards["whiteRight"])
+        black_left = get_column_strings(boards["blackLeft"])
+        black_right = get_column_strings(boards["blackRight"])
 
         def join_rows(left_half, right_half):
             return [f"{' '.join(left)} | {' '.join(right)}" for left, right in zip(left_half, right_half)]
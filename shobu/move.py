@@ -1,9 +1,36 @@
+# Sub board names in the order of their indices (Moves keep their boards as indices)
+BOARD_NAMES: tuple[str, ...] = ("blackLeft", "blackRight", "whiteLeft", "whiteRight")
+BOARD_INDICES: dict[str, int] = {name: i for i, name in enumerate(BOARD_NAMES)}
+
+
 class Cord:
+    """
+    Immutable coordinate. Cords within a few squares of the board are interned, so building one again returns the same
+    object instead of allocating a new one.
+    """
+    __slots__ = ("_x", "_y")
+
     _BOUNDS = [0, 1, 2, 3]
 
-    def __init__(self, x: int, y: int) -> None:
-        self._x = x
-        self._y = y
+    # Range of x and y that is interned, covering every square, difference and direction a move can have
+    _INTERNED_RANGE = range(-4, 8)
+    _interned: dict[tuple[int, int], "Cord"] = {}
+
+    def __new__(cls, x: int, y: int):
+        cord = cls._interned.get((x, y))
+
+        if cord is None:
+            cord = super().__new__(cls)
+            cord._x = x
+            cord._y = y
+
+            if x in cls._INTERNED_RANGE and y in cls._INTERNED_RANGE:
+                cls._interned[(x, y)] = cord
+
+        return cord
+
+    def __reduce__(self):
+        return Cord, (self._x, self._y)
 
     @property
     def x(self) -> int:
@@ -25,6 +52,13 @@ class Cord:
     def valid(self) -> bool:
         return self._x in self._BOUNDS and self._y in self._BOUNDS
 
+    @property
+    def square(self) -> int:
+        """
+        Bit index of the square on a sub board (x + 4y), only meaningful for valid cords.
+        """
+        return self._x + 4 * self._y
+
     def __add__(self, other):
         return Cord(self._x + other.x, self._y + other.y)
 
@@ -38,13 +72,45 @@ class Cord:
         return f"[{self._x}, {self._y}]"
 
     def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
+        return self is other or (isinstance(other, Cord) and self._x == other._x and self._y == other._y)
+
+    def __hash__(self):
+        return hash((self._x, self._y))
 
 
 class Move:
-    def __init__(self, start: Cord, end: Cord):
-        self._start: Cord = start
-        self._end: Cord = end
+    """
+    Immutable move from one cord to another. Difference, direction and magnitude are worked out once when a move is
+    built, and moves between two squares of a sub board are interned.
+    """
+    __slots__ = ("_start", "_end", "_difference", "_normalized_difference", "_magnitude")
+
+    _interned: dict[tuple[Cord, Cord], "Move"] = {}
+
+    def __new__(cls, start: Cord, end: Cord):
+        move = cls._interned.get((start, end))
+
+        if move is None:
+            move = super().__new__(cls)
+            move._start = start
+            move._end = end
+
+            dx, dy = end.x - start.x, end.y - start.y
+            move._difference = Cord(dx, dy)
+
+            # Calculate normalized values based on maximum absolute component
+            max_component = max(abs(dx), abs(dy))
+            move._magnitude = max_component
+            move._normalized_difference = Cord(int(dx / max_component), int(dy / max_component)) if max_component \
+                else Cord(0, 0)
+
+            if start.valid and end.valid:
+                cls._interned[(start, end)] = move
+
+        return move
+
+    def __reduce__(self):
+        return Move, (self._start, self._end)
 
     @property
     def start(self):
@@ -60,27 +126,15 @@ class Move:
 
     @property
     def difference(self) -> Cord:
-        return Cord(self._end.x - self._start.x, self._end.y - self._start.y)
+        return self._difference
 
     @property
     def normalized_difference(self) -> Cord:
-        dx = self.difference.x
-        dy = self.difference.y
-
-        # Calculate normalized values based on maximum absolute component
-        max_component = max(abs(dx), abs(dy))
-
-        if max_component == 0:
-            return Cord(0, 0)
-
-        return Cord(
-            int(dx / max_component),
-            int(dy / max_component)
-        )
+        return self._normalized_difference
 
     @property
     def magnitude(self):
-        return max(abs(self.difference.x), abs(self.difference.y))
+        return self._magnitude
 
     def __add__(self, other):
         return Move(self._start + other.start, self._end + other.end)
@@ -95,16 +149,25 @@ class Move:
         return f"{self._start} => {self._end}"
 
     def __eq__(self, other):
-        return self.start == other.start and self.end == other.end
+        return self is other or (isinstance(other, Move) and self._start == other._start and self._end == other._end)
+
+    def __hash__(self):
+        return hash((self._start, self._end))
 
 
 class MovePair:
-    def __init__(self, passive_move: Move, aggressive_move: Move, passive_board: str, aggressive_board: str):
+    """
+    Passive and aggressive move of one turn, with the sub boards they are played on. Boards can be given by name or
+    index, and are kept as indices (See BOARD_NAMES).
+    """
+    __slots__ = ("_passive_move", "_aggressive_move", "_passive_board", "_aggressive_board")
+
+    def __init__(self, passive_move: Move, aggressive_move: Move, passive_board: str or int, aggressive_board: str or int):
         self._passive_move: Move = passive_move
         self._aggressive_move: Move = aggressive_move
 
-        self._passive_board: str = passive_board
-        self._aggressive_board: str = aggressive_board
+        self._passive_board: int = passive_board if isinstance(passive_board, int) else BOARD_INDICES[passive_board]
+        self._aggressive_board: int = aggressive_board if isinstance(aggressive_board, int) else BOARD_INDICES[aggressive_board]
 
     @property
     def passive_move(self) -> Move:
@@ -116,14 +179,25 @@ class MovePair:
 
     @property
     def passive_board(self) -> str:
-        return self._passive_board
+        return BOARD_NAMES[self._passive_board]
 
     @property
     def aggressive_board(self) -> str:
+        return BOARD_NAMES[self._aggressive_board]
+
+    @property
+    def passive_board_index(self) -> int:
+        return self._passive_board
+
+    @property
+    def aggressive_board_index(self) -> int:
         return self._aggressive_board
 
     def __str__(self):
-        return f"Passive    ({self._passive_board}): {self._passive_move}\nAggressive ({self._aggressive_board}): {self._aggressive_move}"
+        return f"Passive    ({self.passive_board}): {self._passive_move}\nAggressive ({self.aggressive_board}): {self._aggressive_move}"
 
     def __eq__(self, other):
-        return self.passive_move == other.passive_move and self.aggressive_move == other.aggressive_move and self.passive_board == other.passive_board and self.aggressive_board == other.aggressive_board
+        return isinstance(other, MovePair) and self._passive_move == other._passive_move and self._aggressive_move == other._aggressive_move and self._passive_board == other._passive_board and self._aggressive_board == other._aggressive_board
+
+    def __hash__(self):
+        return hash((self._passive_move, self._aggressive_move, self._passive_board, self._aggressive_board))
@@ -0,0 +1,47 @@
+"""
+Perft: counting the positions reached by every sequence of legal moves to a depth, for checking move generation and
+make / undo against known numbers, and timing them.
+"""
+from shobu.board import Board
+from shobu.move import MovePair
+
+
+def perft(board: Board, depth: int) -> int:
+    """
+    Returns the number of positions at the given depth below a board. A won position is counted as a leaf, since the
+    game ends there, and so is the board itself at a depth of 0 or below. Moves are made and undone on the board, so it
+    is unchanged afterwards.
+    """
+    if depth <= 0 or board.is_terminal:
+        return 1
+
+    moves = board.get_legal_moves_encoded()
+
+    # Every child is a leaf, so they only have to be counted
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        board.make_move_encoded(move)
+        nodes += perft(board, depth - 1)
+        board.undo_move_encoded()
+
+    return nodes
+
+
+def divide(board: Board, depth: int) -> list[tuple[MovePair, int]]:
+    """
+    Returns every legal move of a board with the perft count below it, in generation order. The counts add up to
+    perft(board, depth). Raises ValueError for a depth below 1, which has no moves to split by.
+    """
+    if depth < 1:
+        raise ValueError(f"Divide needs a depth of at least 1, got {depth}")
+
+    counts = []
+    for move in board.get_legal_moves_encoded():
+        board.make_move_encoded(move)
+        counts.append((Board.decode_move(move), perft(board, depth - 1)))
+        board.undo_move_encoded()
+
+    return counts